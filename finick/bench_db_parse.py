@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+from __future__ import division  # py3 style. division promotes to floating point.
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+# like the other scripts, import the api first. (db_file imports from api, which imports db_file)
+import finicky.api
+from finicky.db_file import DbTextFile
+from finicky.db_row import DbRow
+
+import hashlib
+import io
+import sys
+import timeit
+
+# this is a developer tool. it does not touch git, the ini file, or any real db file.
+# it builds a synthetic db file in memory and reports how fast we can parse it.
+#
+# usage (from the directory that holds your 'finick' folder, like the other scripts):
+#
+#     finick/bench_db_parse.py            (defaults to 100000 rows)
+#     finick/bench_db_parse.py 250000
+
+
+def _synthetic_db_lines(how_many_rows):
+    committers = ['jdoe@example.com', 'asmith@example.com', 'lchen@example.com',
+                  'mgarcia@example.com', 'tnguyen@example.com']
+    kinds = ['OK', 'OK', 'OK', 'WAIT', 'HIDE', 'FIXD', 'TODO', 'PLS', 'OOPS']
+
+    lines = ['@:..finick_code_reviews db_file v0.00']
+    for i in range(0, how_many_rows):
+        c_hash = hashlib.sha1(str(i).encode('utf-8')).hexdigest()
+        committer = committers[i % len(committers)]
+        reviewer = committers[(i + 1) % len(committers)]
+        kind = kinds[i % len(kinds)]
+        datestr = '2016-%02d-%02d_12:34:56' % ((i % 12) + 1, (i % 28) + 1)
+
+        # (hope-FIXD tags only make sense above rows still awaiting review)
+        if kind == 'WAIT' and i % 45 == 3:
+            lines.append('; a file comment, with hope-FIXD:' + c_hash[0:7])
+
+        if kind == 'WAIT':
+            lines.append(committer + '   ' + c_hash + '   ' + datestr + '   WAIT')
+        elif kind == 'HIDE':
+            lines.append(committer + '   ' + c_hash + '   ' + datestr +
+                         '   HIDE   ..nobody..   # merge commit without content')
+        elif kind == 'FIXD':
+            lines.append(committer + '   ' + c_hash + '   ' + datestr +
+                         '   FIXD   ' + reviewer + '   ' + c_hash[0:10] +
+                         '   # thanks for the fix')
+        else:
+            lines.append(committer + '   ' + c_hash + '   ' + datestr + '   ' +
+                         kind + '   ' + reviewer + '   # some reviewer notes')
+
+    return lines
+
+
+def _report(label, how_many_rows, seconds):
+    print('%-34s %8.3f sec   %10.0f rows/sec' %
+          (label, seconds, how_many_rows / seconds))
+
+
+def run_benchmark(how_many_rows):
+    lines = _synthetic_db_lines(how_many_rows)
+    row_lines = [l for l in lines if not (l.startswith('@') or l.startswith(';'))]
+
+    print('Parsing a synthetic db file of ' + str(how_many_rows) + ' rows.\n')
+
+    # just the per-row parser:
+    start = timeit.default_timer()
+    for l in row_lines:
+        DbRow.create_from_string(l, '')
+    _report('DbRow.create_from_string', how_many_rows,
+            timeit.default_timer() - start)
+
+    # the whole file-reading path (minus the git checks), including file comments and hope-FIXD tags:
+    text = '\n'.join(lines) + '\n'
+    start = timeit.default_timer()
+    db = DbTextFile.dummyinstance()
+    db._absorb_lines(io.StringIO(text).read().split('\n'), False, False)
+    _report('DbTextFile (whole file)', how_many_rows,
+            timeit.default_timer() - start)
+
+
+if __name__ == '__main__':
+    qty = 100000
+    if len(sys.argv) > 1:
+        qty = int(sys.argv[1])
+
+    run_benchmark(qty)
@@ -8,7 +8,8 @@ from __future__ import absolute_import
 from finicky.api import (prelaunch_checklist_close,
                          finick_db_integrity_check_close,
                          finick_db_merge_with_completed_assignments)
-from finicky.gitting import git_establish_session_readiness_end
+from finicky.gitting import (git_establish_session_readiness_end,
+                             git_print_timing_report)
 from finicky.error import FinickError
 
 import os
@@ -27,20 +28,29 @@ def finish_session():
     if False == finick_config.is_ok:
         raise FinickError("unable to parse the config/ini file")
 
-    # basic sanity checks for being in the right repo and right branch, etc:
-    if True != git_establish_session_readiness_end(finick_config):
-        raise FinickError("unable to establish git readiness")
+    try:
+        # basic sanity checks for being in the right repo and right branch, etc:
+        if True != git_establish_session_readiness_end(finick_config):
+            raise FinickError("unable to establish git readiness")
 
-    # is a session in progress?
+        # is a session in progress?
 
-    # reviews file integrity check.
-    # reviews file should now be properly upgraded already.
-    # first line in DB file should be file version info
-    db_handle = finick_db_integrity_check_close(finick_config)
+        # reviews file integrity check.
+        # reviews file should now be properly upgraded already.
+        # first line in DB file should be file version info
+        db_handle = finick_db_integrity_check_close(finick_config)
 
-    if None != db_handle:
-        # when the next call completes exception-free, it also closes the session:
-        finick_db_merge_with_completed_assignments(finick_config, db_handle)
+        if None != db_handle:
+            # when the next call completes exception-free, it also closes the session:
+            finick_db_merge_with_completed_assignments(finick_config,
+                                                       db_handle)
+    finally:
+        # (even when something above failed. this only prints anything when the
+        #  ini file sets Verbosity to 1 or more)
+        git_print_timing_report(finick_config)
 
 
-finish_session()
+# the guard matters for '-d -j N': where multiprocessing spawns its workers (the
+# default on macOS and Windows), each worker imports this file again.
+if __name__ == '__main__':
+    finish_session()
@@ -7,7 +7,6 @@ import glob
 import gettext
 import locale
 import argparse
-import copy
 
 # Set up message catalog access.
 # Python-3.4.3//Tools/i18n/pygettext.py finick/finicky/*py *py finick/*py # to generate pot
@@ -47,6 +46,12 @@ def prelaunch_checklist_open(calling_filename):
         metavar="TODO_DEBTOR",
         help="output todos of the TODO_DEBTOR, but do not start a session",
         action="store")
+    parser.add_argument(
+        "-a",
+        "--all-todos",
+        help="output the todos of EVERY developer who has any (each developer "
+        "also gets their own todos file), but do not start a session",
+        action="store_true")
     parser.add_argument(
         "-d",
         "--draw-charts",
@@ -56,6 +61,21 @@ def prelaunch_checklist_open(calling_filename):
         "The charts option will not start a session. (But it will print your "
         "todos. Prepare to be nagged.)",
         action="store_true")
+    parser.add_argument(
+        "--chart-archives",
+        help="when drawing charts (-d), also include the older rows that "
+        "WeeksTilPurge moved out of the db file and into the archive files. "
+        "(reading every archive takes longer, so this is off by default.)",
+        action="store_true")
+    parser.add_argument(
+        "-j",
+        "--chart-workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="when drawing charts (-d), render the charts of N developers at "
+        "a time, in N separate processes. (default: 1, one after another)",
+        action="store")
     parser.add_argument(
         "commits",
         nargs='*',
@@ -128,11 +148,19 @@ def finick_preopen_session(finick_config, db_handle):
     assignments = db_handle.generate_assignments_for_this_session(
         finick_config)
 
-    # the config will compute whether the debtor is the reviewer or otherwise, based on settings/flags:
-    todos_n_pleases = db_handle.generate_todos_for(finick_config.todo_debtor)
+    # with '-a' we gather everyone's todos at once, rather than needing one run per developer.
+    # (that covers the single debtor, too, so then we skip the separate pass for them)
+    todos_n_pleases = []
+    todos_by_debtor = {}
+    if finick_config.opt_alltodos:
+        todos_by_debtor = db_handle.generate_todos_for_everyone()
+    else:
+        # the config will compute whether the debtor is the reviewer or otherwise, based on settings/flags:
+        todos_n_pleases = db_handle.generate_todos_for(
+            finick_config.todo_debtor)
 
     wrapper_helper = RowPrinterForSessionStart(finick_config, assignments,
-                                               todos_n_pleases)
+                                               todos_n_pleases, todos_by_debtor)
     return wrapper_helper
 
 
@@ -141,10 +169,10 @@ def finick_create_charts(finick_config, db_handle):
     # intentionally import this at the LAST POSSIBLE opportunity:
     from finicky.chart_generator import ChartGenerator
 
-    map_by_week, list_of_devs = db_handle.get_human_driven_commits_aggregated_by_week(
+    counts_by_week = db_handle.get_human_driven_commit_counts_by_week(
         finick_config)
 
-    chart_gen = ChartGenerator(finick_config, map_by_week, list_of_devs)
+    chart_gen = ChartGenerator(finick_config, counts_by_week)
 
     chart_gen.draw_charts()
 
@@ -188,8 +216,11 @@ def finick_db_merge_with_completed_assignments(finick_config, db_handle):
     # (we know AT LEAST ONE commit happened: the CommitStringStartSession commit)
     db_handle.add_new_commits()
 
-    # save a copy BEFORE calling the 'merge' operation. this enables us to create the correct prior_todo_map later.
-    premerge_handle = copy.deepcopy(db_handle)
+    # gather the open TODOs BEFORE calling the 'merge' operation. this enables us to create the correct prior_todo_map later.
+    # (the summary only ever covers committers from the assignments file, so those are the only ones we need)
+    premerge_todo_map = {}
+    for committer in assign_fhandle.get_committers():
+        premerge_todo_map[committer] = db_handle.generate_todos_for(committer)
 
     # note: the rows from assignments might be mutated after this call:
     summary_map, work_count = db_handle.merge_completed_assignments(
@@ -218,8 +249,7 @@ def finick_db_merge_with_completed_assignments(finick_config, db_handle):
         # in addition to the summary_map, we must prepare a TODO-map for the printer, too:
         prior_todo_map = {}
         for committer in summary_map:
-            prior_todo_map[committer] = premerge_handle.generate_todos_for(
-                committer)
+            prior_todo_map[committer] = premerge_todo_map[committer]
 
         # prepare email messages. (do this BEFORE the final git commands, so we have this even if git fails)
         summary_printer = RowPrinterSessionEndSummary(
@@ -0,0 +1,150 @@
+from __future__ import print_function
+from __future__ import division  # py3 style. division promotes to floating point.
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from finicky.db_row import AssertType_DbRow, DbRow
+from finicky.error import FinickError
+
+
+def _numpy_or_none():
+    # numpy is only needed for charts, so (like matplotlib) we import it as late as we can.
+    # without it, the table is kept in plain nested lists.
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+class ChartCountsTable(object):
+    """How many rows each developer has, per week, per role, per outcome class.
+
+    It is built in ONE walk over the rows, and then every per-developer chart only
+    needs to slice it:
+
+        counts_for(dev, ROLE_AUTHOR, CLASS_OOPSISH) -> one count per week (oldest week first)
+
+    Only weeks that hold at least one (human-made) commit get a slot.
+    Developers are matched ignoring case.
+    """
+
+    ROLE_AUTHOR = 0
+    ROLE_REVIEWER = 1
+    _ROLE_COUNT = 2
+
+    CLASS_OOPSISH = 0
+    CLASS_HOORAYISH = 1
+    CLASS_PENDING = 2
+    _CLASS_COUNT = 3
+
+    # yapf: disable
+    _CLASS_OF_TYPE_AS_AUTHOR = {
+        DbRow.TYPE_OOPS: CLASS_OOPSISH,   DbRow.TYPE_TODO: CLASS_OOPSISH,
+        DbRow.TYPE_OK: CLASS_HOORAYISH,   DbRow.TYPE_FIXD: CLASS_HOORAYISH,   DbRow.TYPE_PLS: CLASS_HOORAYISH,
+        DbRow.TYPE_WAIT: CLASS_PENDING,
+    }
+
+    # a PLS is oopsish for the reviewer who asked for it (that reviewer caught something):
+    _CLASS_OF_TYPE_AS_REVIEWER = {
+        DbRow.TYPE_OOPS: CLASS_OOPSISH,   DbRow.TYPE_TODO: CLASS_OOPSISH,     DbRow.TYPE_PLS: CLASS_OOPSISH,
+        DbRow.TYPE_OK: CLASS_HOORAYISH,   DbRow.TYPE_FIXD: CLASS_HOORAYISH,
+        DbRow.TYPE_WAIT: CLASS_PENDING,
+    }
+    # yapf: enable
+
+    def __init__(self, rows):
+        # rows can be any iterable of DbRow. machine-made rows (HIDE, RVRT) are left out.
+        self.__all_devs = []  # as first spelled in the rows, in order of first appearance
+        self.__dev_slot_by_lowered = {}
+        self.__week_mondays = []  # datetime of each week's monday, oldest first
+        self.__counts = None  # [week][dev][role][class]. a numpy array when numpy is around
+
+        self._tally(rows)
+
+    def _tally(self, rows):
+        lowered_of = {}  # email -> email.lower(). (there are few emails, but many rows)
+        monday_by_week_key = {}
+        tally = {}  # (week_key, dev_slot, role, class) -> count
+
+        def dev_slot_of(email):
+            lowered = lowered_of.get(email, None)
+            if lowered is None:
+                lowered = email.lower()
+                lowered_of[email] = lowered
+                self.__all_devs.append(email)
+            return self.__dev_slot_by_lowered.setdefault(
+                lowered, len(self.__dev_slot_by_lowered))
+
+        for r in rows:
+            AssertType_DbRow(r)
+            # exclude commits that are 'machine-made' (done by finick):
+            if r.row_was_machine_created():
+                continue
+
+            if r.committer == '' and r.reviewer == '':
+                raise FinickError(
+                    'Row is missing both the reviewer and committer.')
+
+            week_key = r.week_key
+            if week_key not in monday_by_week_key:
+                monday_by_week_key[week_key] = r.prior_monday
+
+            #note: do _NOT_ use 'elif' !! self-review is possible.
+            # (meaning something where committer is 'a' could also have reviewer is 'a')
+            if r.committer != '':
+                outcome = self._CLASS_OF_TYPE_AS_AUTHOR.get(r.row_type, None)
+                slot = dev_slot_of(r.committer)
+                if outcome is not None:
+                    cell = (week_key, slot, self.ROLE_AUTHOR, outcome)
+                    tally[cell] = tally.get(cell, 0) + 1
+
+            if r.reviewer != '':
+                outcome = self._CLASS_OF_TYPE_AS_REVIEWER.get(r.row_type, None)
+                slot = dev_slot_of(r.reviewer)
+                if outcome is not None:
+                    cell = (week_key, slot, self.ROLE_REVIEWER, outcome)
+                    tally[cell] = tally.get(cell, 0) + 1
+
+        week_keys = sorted(monday_by_week_key)
+        week_slot_of = dict((wk, i) for i, wk in enumerate(week_keys))
+        self.__week_mondays = [monday_by_week_key[wk] for wk in week_keys]
+
+        shape = (len(week_keys), len(self.__dev_slot_by_lowered),
+                 self._ROLE_COUNT, self._CLASS_COUNT)
+
+        numpy = _numpy_or_none()
+        if numpy is not None:
+            self.__counts = numpy.zeros(shape, dtype=numpy.int64)
+        else:
+            self.__counts = [[[[0] * shape[3] for role in range(shape[2])]
+                              for dev in range(shape[1])]
+                             for week in range(shape[0])]
+
+        for (week_key, slot, role, outcome), count in tally.items():
+            self.__counts[week_slot_of[week_key]][slot][role][outcome] = count
+
+    def get_devs(self):
+        return list(self.__all_devs)
+
+    def get_week_count(self):
+        return len(self.__week_mondays)
+
+    def get_week_labels(self):
+        return [m.strftime("%Y-%m-%d") for m in self.__week_mondays]
+
+    def get_month_labels(self):
+        """For each week, the month it belongs to. (the next outer enclosing bucket of a week)
+        """
+        return [m.strftime("%Y-%m") for m in self.__week_mondays]
+
+    def counts_for(self, developer, role, outcome_class):
+        # one (plain int) count per week, oldest week first. zeros for an unknown developer.
+        slot = self.__dev_slot_by_lowered.get(developer.lower(), None)
+        if slot is None:
+            return [0] * len(self.__week_mondays)
+
+        if isinstance(self.__counts, list):
+            return [week[slot][role][outcome_class] for week in self.__counts]
+
+        return self.__counts[:, slot, role, outcome_class].tolist()
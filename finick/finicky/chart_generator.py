@@ -3,178 +3,236 @@ from __future__ import division  # py3 style. division promotes to floating poin
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
-from finicky.db_row import AssertType_DbRow, DbRow
+from finicky.chart_counts import ChartCountsTable
 from finicky.parse_config import AssertType_FinickConfig
 from finicky.error import FinickError
 
-import random
+import hashlib
+import json
+import os
+from io import open
 
+# bump this whenever _render_chart_of_one_dev starts drawing differently. (it is part
+# of every chart fingerprint, so that all charts get redrawn after such a change)
+_CHART_DRAWING_VERSION = 'v1'
 
-class CalendarBucket(object):
-    def __init__(self, date_obj, commits_list, targeted_dev):
-        self.__datetime_obj = date_obj
-        self.__developer = targeted_dev
-        self.__commits_in_bucket_author = []
-        self.__commits_in_bucket_reviewer = []
 
-        dr = DbRow.dummyinstance()
-        self.__oopsish_author = [dr.TYPE_OOPS, dr.TYPE_TODO]
-        self.__oopsish_rviewr = [dr.TYPE_OOPS, dr.TYPE_TODO, dr.TYPE_PLS]
+def _stats_by_mapkey_buckets(plotter,
+                             y_bottom_int,
+                             bar_width,
+                             bar_anchors,
+                             portions_a,
+                             colorname_a,
+                             portions_b,
+                             colorname_b,
+                             portions_c=[],
+                             colorname_c=''):
+    """
+    Making a STACKED BAR CHART. (plotter is a matplotlib Axes)
+    """
+
+    how_many_bars = len(portions_a)
+    bottom_0 = []
+
+    for i in range(0, how_many_bars):
+        bottom_0 += [y_bottom_int]
+
+    bottom_1 = [x + y for x, y in zip(bottom_0, portions_a)]
+
+    bottom_2 = [x + y for x, y in zip(bottom_1, portions_b)]
+
+    if len(portions_c) > 0:
+        sum_portions = [
+            x + y + z for x, y, z in zip(portions_a, portions_b, portions_c)
+        ]
+    else:
+        sum_portions = [x + y for x, y in zip(portions_a, portions_b)]
+
+    high_bar = max(sum_portions) + y_bottom_int
+
+    p1 = plotter.bar(bar_anchors,
+                     portions_a,
+                     bar_width,
+                     color=colorname_a,
+                     bottom=bottom_0)
+
+    p2 = plotter.bar(bar_anchors,
+                     portions_b,
+                     bar_width,
+                     color=colorname_b,
+                     bottom=bottom_1)
+
+    if len(portions_c) > 0:
+        p3 = plotter.bar(bar_anchors,
+                         portions_c,
+                         bar_width,
+                         color=colorname_c,
+                         bottom=bottom_2)
 
-        self.__hoorayish_author = [dr.TYPE_OK, dr.TYPE_FIXD, dr.TYPE_PLS]
-        self.__hoorayish_rviewr = [dr.TYPE_OK, dr.TYPE_FIXD]
+    return high_bar
 
-        self.__pending = [dr.TYPE_WAIT]
 
-        for commit in commits_list:
-            if commit.committer.lower() == self.__developer.lower():
-                self.__commits_in_bucket_author.append(commit)
+def _render_chart_of_one_dev(layout):
+    """Draws (and saves) the png of one developer.
 
-            #note: do _NOT_ use 'elif' !! self-review is possible.
-            # (meaning something where committer is 'a' could also have reviewer is 'a')
-            if commit.reviewer.lower() == self.__developer.lower():
-                self.__commits_in_bucket_reviewer.append(commit)
+    This lives at module level (and only takes plain data) so that a multiprocessing
+    pool can run it. Every call gets its own Figure on the Agg backend, so nothing goes
+    through the shared matplotlib.pyplot state.
+    """
 
-    def _count_filtered_by_types(self, what_to_filter, list_of_types):
-        rslt = 0
-        for commit in what_to_filter:
-            if commit.row_type in list_of_types:
-                rslt += 1
+    # defer these imports until the last possible moment:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-        return rslt
+    target_developer = layout['developer']
+    bar_width = layout['bar_width']
+    bar_anchors = layout['bar_anchors']
 
-    def get_bucket_label(self):
+    oops_author_color = 'orangered'
+    hooray_author_color = 'palegreen'
+    unreviewed_color = '#DDDDDD'  # light grey
 
-        return self.__datetime_obj.strftime("%Y-%m-%d")
+    oops_reviewer_color = 'gold'
+    hooray_reviewer_color = 'khaki'
 
-    def get_id_of_outer_enclosing_bucket(self):
-        """When the bucket represents a week, the next outer enclosing bucket is the month.
-        """
-        return self.__datetime_obj.strftime("%Y-%m")
+    fig = Figure()
+    FigureCanvasAgg(fig)  # (attaches itself to fig)
+    ax = fig.add_subplot(1, 1, 1)
 
-    def get_oopsish_by_author(self):
+    high_bar = _stats_by_mapkey_buckets(
+        ax, 0, bar_width, bar_anchors, layout['barportion_0'],
+        oops_author_color, layout['barportion_1'], hooray_author_color,
+        layout['barportion_2'], unreviewed_color)
 
-        return self._count_filtered_by_types(self.__commits_in_bucket_author,
-                                             self.__oopsish_author)
+    high_bar += 3
 
-    def get_hoorayish_by_author(self):
+    ax.axhline(high_bar)
 
-        return self._count_filtered_by_types(self.__commits_in_bucket_author,
-                                             self.__hoorayish_author)
+    label_position_for_lower_row = high_bar / 2
 
-    def get_waitcount_authored_by(self):
+    new_high_bar = _stats_by_mapkey_buckets(
+        ax, high_bar, bar_width, bar_anchors, layout['rviewr_barportion_0'],
+        oops_reviewer_color, layout['rviewr_barportion_1'],
+        hooray_reviewer_color)
 
-        return self._count_filtered_by_types(self.__commits_in_bucket_author,
-                                             self.__pending)
+    label_position_for_upper_row = high_bar + ((new_high_bar - high_bar) / 2)
 
-    def get_oopsish_by_reviewer(self):
+    # if we need a 90-degree rotated ylabel:
+    #ax.set_ylabel('This side\nsecond line')
 
-        return self._count_filtered_by_types(self.__commits_in_bucket_reviewer,
-                                             self.__oopsish_rviewr)
+    ax.set_title('Code Reviews by and for ' + target_developer)
 
-    def get_hoorayish_by_reviewer(self):
+    # sequence of tick positions, then a sequence of tick labels:
+    ax.set_xticks(layout['label_right_anchors'])
+    ax.set_xticklabels(layout['wlabels'], rotation=60, ha='right')
 
-        return self._count_filtered_by_types(self.__commits_in_bucket_reviewer,
-                                             self.__hoorayish_rviewr)
+    for t in ax.xaxis.get_major_ticks():
+        t.tick1On = False  # a hack-around to hide ticks (while keeping tick labels)
+        t.tick2On = False  # a hack-around to hide ticks (while keeping tick labels)
 
+    for xspot in layout['vline_anchors']:
+        ax.axvline(x=xspot, color='gray', linewidth=0.5, linestyle=':')
 
-class ChartGenerator(object):
-    def __init__(self, finick_config, commits_map, list_of_devs):
-        self.__finick_config = finick_config
-        self.__all_devs = list_of_devs
-        self.__aggregated_commit_lists = commits_map
+    # sequence of tick positions, then a sequence of tick labels:
+    ax.set_yticks([label_position_for_upper_row, label_position_for_lower_row])
+    ax.set_yticklabels([target_developer + ' as reviewer\n(code reading)',
+                        target_developer + ' as committer\n(code authoring)'])
 
-        AssertType_FinickConfig(self.__finick_config)
+    # be careful: it will save right over any preexisting file:
+    fig.savefig(layout['filename'],
+                dpi=300,
+                bbox_inches='tight',
+                pad_inches=0.75)
 
-        # each map key should be a date, and the mapped value is a list:
-        for map_key, val in self.__aggregated_commit_lists.items():
-            for list_item in val:
-                AssertType_DbRow(list_item)
-
-    def _stats_by_mapkey_buckets(self,
-                                 plotter,
-                                 y_bottom_int,
-                                 bar_width,
-                                 bar_anchors,
-                                 portions_a,
-                                 colorname_a,
-                                 portions_b,
-                                 colorname_b,
-                                 portions_c=[],
-                                 colorname_c=''):
-        """
-        Making a STACKED BAR CHART.
-        """
+    # only once the png is safely written do we record what it shows:
+    with open(_fingerprint_filename(layout), 'w', encoding='utf-8') as f:
+        f.write(layout['fingerprint'] + '\n')
 
-        how_many_bars = len(portions_a)
-        bottom_0 = []
+    return layout['filename']
 
-        for i in range(0, how_many_bars):
-            bottom_0 += [y_bottom_int]
 
-        bottom_1 = [x + y for x, y in zip(bottom_0, portions_a)]
+def _fingerprint_filename(layout):
+    # the fingerprint sits right next to its png
+    return layout['filename'] + '.sha1'
 
-        bottom_2 = [x + y for x, y in zip(bottom_1, portions_b)]
 
-        if len(portions_c) > 0:
-            sum_portions = [
-                x + y + z
-                for x, y, z in zip(portions_a, portions_b, portions_c)
-            ]
-        else:
-            sum_portions = [x + y for x, y in zip(portions_a, portions_b)]
+def _fingerprint_of_layout(layout):
+    # everything the png is drawn from: the layout (which holds the bucket series),
+    # our drawing code, and the matplotlib that draws it.
+    import matplotlib
 
-        high_bar = max(sum_portions) + y_bottom_int
+    fingerprint = hashlib.sha1()
+    fingerprint.update(_CHART_DRAWING_VERSION.encode('utf-8'))
+    fingerprint.update(b'\0' + matplotlib.__version__.encode('utf-8'))
+    fingerprint.update(b'\0' + json.dumps(layout, sort_keys=True).encode(
+        'utf-8'))
+    return fingerprint.hexdigest()
 
-        p1 = plotter.bar(bar_anchors,
-                         portions_a,
-                         bar_width,
-                         color=colorname_a,
-                         bottom=bottom_0)
 
-        p2 = plotter.bar(bar_anchors,
-                         portions_b,
-                         bar_width,
-                         color=colorname_b,
-                         bottom=bottom_1)
+def _chart_is_unchanged(layout):
+    if not os.path.isfile(layout['filename']):
+        return False
 
-        if len(portions_c) > 0:
-            p3 = plotter.bar(bar_anchors,
-                             portions_c,
-                             bar_width,
-                             color=colorname_c,
-                             bottom=bottom_2)
+    try:
+        with open(_fingerprint_filename(layout), 'r', encoding='utf-8') as f:
+            return f.read().strip() == layout['fingerprint']
+    except IOError:
+        # (no fingerprint yet. perhaps the png came from an older finick)
+        return False
+
+
+class ChartGenerator(object):
+    def __init__(self, finick_config, counts_table):
+        self.__finick_config = finick_config
+        self.__counts = counts_table
 
-        return high_bar
+        AssertType_FinickConfig(self.__finick_config)
+
+        if type(self.__counts) != ChartCountsTable:
+            raise FinickError('ChartGenerator requires a ChartCountsTable.')
+
+        self.__all_devs = self.__counts.get_devs()
 
     def draw_charts(self):
-        for dev in self.__all_devs:
-            self._draw_charts_one_dev(dev)
+        # the layouts are worked out here, in order. only the drawing is farmed out.
+        layouts = [self._layout_of_one_dev(dev) for dev in self.__all_devs]
 
-    def _draw_charts_one_dev(self, target_developer):
+        # a chart whose png (and fingerprint) says it already shows these very
+        # numbers does not need to be drawn again:
+        to_render = []
+        for lt in layouts:
+            lt['fingerprint'] = _fingerprint_of_layout(lt)
+            if not _chart_is_unchanged(lt):
+                to_render.append(lt)
 
-        # defer these imports until the last possible moment:
-        import numpy
-        import matplotlib.pyplot
+        workers = min(self.__finick_config.opt_chartworkers, len(to_render))
 
-        barportion_0 = []  # oops as an author
-        barportion_1 = []  # hooray by author
-        barportion_2 = []  # still un-reviewed for this author
+        if workers <= 1:
+            saved_files = [_render_chart_of_one_dev(lt) for lt in to_render]
+        else:
+            import multiprocessing
 
-        oops_author_color = 'orangered'
-        hooray_author_color = 'palegreen'
-        unreviewed_color = '#DDDDDD'  # light grey
+            pool = multiprocessing.Pool(workers)
+            try:
+                # map hands the results back in the order of to_render. (and each
+                # developer has a png of their own, so workers never share a file)
+                saved_files = pool.map(_render_chart_of_one_dev, to_render, 1)
+            finally:
+                pool.close()
+                pool.join()
 
-        rviewr_barportion_0 = []  # oops *caught* while reviewing
-        rviewr_barportion_1 = []  # hoorays granted while reviewing
+        print('Charts: ' + str(len(saved_files)) + ' rendered, ' + str(len(
+            layouts) - len(saved_files)) + ' reused (unchanged since last time).')
 
-        oops_reviewer_color = 'gold'
-        hooray_reviewer_color = 'khaki'
+        return saved_files
+
+    def _layout_of_one_dev(self, target_developer):
+        """Everything needed to draw the chart of one developer, as plain (picklable) data.
+        """
 
         zoom_multiplier_auth = 1  # adjust this (upwards) if items reviewed dwarfs (dominates) items authored
         zoom_multiplier_rvwr = 1  # adjust this (up) if items authored dominates the chart
 
-        matplotlib.pyplot.clf()
         bar_width = 2
         bar_spacing = 5
         xlabel_shift = bar_width + 1
@@ -184,101 +242,50 @@ class ChartGenerator(object):
         vline_anchors = []
         trailing_line_id = None
         # for labeling along the x axis:
-        wlabels = []
+        wlabels = self.__counts.get_week_labels()
         label_right_anchors = []
 
-        # the keys are DATES. we want to SORT chronologically:
-        for map_key in sorted(self.__aggregated_commit_lists):
-
-            bucket = CalendarBucket(map_key,
-                                    self.__aggregated_commit_lists[map_key],
-                                    target_developer)
+        # the weeks in the table are already sorted chronologically:
+        for month_id in self.__counts.get_month_labels():
 
             bucket_num = len(bar_anchors)
             bar_anchors += [(bucket_num + 1) * bar_spacing]
-            wlabels += [bucket.get_bucket_label()]
             label_right_anchors += [(
                 (bucket_num + 1) * bar_spacing) + xlabel_shift]
 
-            if (trailing_line_id is not None
-                ) and (trailing_line_id !=
-                           bucket.get_id_of_outer_enclosing_bucket()):
+            if (trailing_line_id is not None) and (trailing_line_id !=
+                                                   month_id):
                 vline_anchors += [bar_anchors[len(bar_anchors) - 1] -
                                   (bar_spacing / 2)]
 
-            trailing_line_id = bucket.get_id_of_outer_enclosing_bucket()
-
-            # height of portion 0 of the bar:
-            barportion_0 += [bucket.get_oopsish_by_author() *
-                             zoom_multiplier_auth]
-
-            # units out of total height that be the color or portion 1:
-            barportion_1 += [bucket.get_hoorayish_by_author() *
-                             zoom_multiplier_auth]
-
-            barportion_2 += [bucket.get_waitcount_authored_by() *
-                             zoom_multiplier_auth]
-
-            rviewr_barportion_0 += [bucket.get_oopsish_by_reviewer() *
-                                    zoom_multiplier_rvwr]
-
-            rviewr_barportion_1 += [bucket.get_hoorayish_by_reviewer() *
-                                    zoom_multiplier_rvwr]
-
-        high_bar = self._stats_by_mapkey_buckets(
-            matplotlib.pyplot, 0, bar_width, bar_anchors, barportion_0,
-            oops_author_color, barportion_1, hooray_author_color, barportion_2,
-            unreviewed_color)
-
-        high_bar += 3
-
-        matplotlib.pyplot.axhline(high_bar)
-
-        label_position_for_lower_row = high_bar / 2
-
-        new_high_bar = self._stats_by_mapkey_buckets(
-            matplotlib.pyplot, high_bar, bar_width, bar_anchors,
-            rviewr_barportion_0, oops_reviewer_color, rviewr_barportion_1,
-            hooray_reviewer_color)
-
-        label_position_for_upper_row = high_bar + (
-            (new_high_bar - high_bar) / 2)
-
-        # if we need a 90-degree rotated ylabel:
-        #matplotlib.pyplot.ylabel('This side\nsecond line')
-
-        matplotlib.pyplot.title('Code Reviews by and for ' + target_developer)
-
-        # sequence of tick positions, then a sequence of tick labels:
-        matplotlib.pyplot.xticks(label_right_anchors,
-                                 wlabels,
-                                 rotation=60,
-                                 ha='right')
-
-        # gca means to 'get current axes':
-        ax = matplotlib.pyplot.gca()
-        for t in ax.xaxis.get_major_ticks():
-            t.tick1On = False  # a hack-around to hide ticks (while keeping tick labels)
-            t.tick2On = False  # a hack-around to hide ticks (while keeping tick labels)
-
-        for xspot in vline_anchors:
-            matplotlib.pyplot.axvline(x=xspot,
-                                      color='gray',
-                                      linewidth=0.5,
-                                      linestyle=':')
-
-        # sequence of tick positions, then a sequence of tick labels:
-        matplotlib.pyplot.yticks(
-            [label_position_for_upper_row, label_position_for_lower_row
-             ], [target_developer + ' as reviewer\n(code reading)',
-                 target_developer + ' as committer\n(code authoring)'])
-
-        # be careful: it will save right over any preexisting file:
-        matplotlib.pyplot.savefig(target_developer + '.png',
-                                  dpi=300,
-                                  bbox_inches='tight',
-                                  pad_inches=0.75)
-
-        #matplotlib.pyplot.show()
-
-        matplotlib.pyplot.close()
+            trailing_line_id = month_id
+
+        # every bar portion is just a slice of the counts table (one count per week):
+        def portion(role, outcome_class, zoom_multiplier):
+            return [c * zoom_multiplier
+                    for c in self.__counts.counts_for(target_developer, role,
+                                                      outcome_class)]
+
+        tbl = ChartCountsTable
+
+        # yapf: disable
+        return {
+            'developer': target_developer,
+            'filename': target_developer + '.png',
+            'bar_width': bar_width,
+            'bar_anchors': bar_anchors,
+            'vline_anchors': vline_anchors,
+            'wlabels': wlabels,
+            'label_right_anchors': label_right_anchors,
+            # oops as an author (the height of portion 0 of the bar):
+            'barportion_0': portion(tbl.ROLE_AUTHOR, tbl.CLASS_OOPSISH, zoom_multiplier_auth),
+            # hooray by author (units out of total height that be the color of portion 1):
+            'barportion_1': portion(tbl.ROLE_AUTHOR, tbl.CLASS_HOORAYISH, zoom_multiplier_auth),
+            # still un-reviewed for this author:
+            'barportion_2': portion(tbl.ROLE_AUTHOR, tbl.CLASS_PENDING, zoom_multiplier_auth),
+            # oops *caught* while reviewing:
+            'rviewr_barportion_0': portion(tbl.ROLE_REVIEWER, tbl.CLASS_OOPSISH, zoom_multiplier_rvwr),
+            # hoorays granted while reviewing:
+            'rviewr_barportion_1': portion(tbl.ROLE_REVIEWER, tbl.CLASS_HOORAYISH, zoom_multiplier_rvwr),
+        }
+        # yapf: enable
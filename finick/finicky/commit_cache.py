@@ -0,0 +1,86 @@
+from __future__ import print_function
+from __future__ import division  # py3 style. division promotes to floating point.
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+from io import open
+
+
+class CommitClassificationCache(object):
+    """Remembers (across runs) which commits gitting decided to HIDE, and why.
+
+    The decision for a commit depends only on the (immutable) commit content,
+    plus the list of submodules and the configured tool strings. The caller
+    folds those last two into 'fingerprint'. Whenever the fingerprint changes,
+    every cached decision is discarded.
+
+    The cache is disposable. It should be git-ignored (like the assignments
+    file). A missing or unreadable cache file simply means an empty cache.
+    """
+
+    def __init__(self, cache_file_location, fingerprint):
+        self.__file_location = cache_file_location
+        self.__fingerprint = fingerprint
+        self.__entries = {}
+        self.__is_modified = False
+
+        self._initialize_from_file()
+
+    def _header_line(self):
+        return '@:..finick_code_reviews commit_cache v0.00 ' + self.__fingerprint
+
+    def _initialize_from_file(self):
+        if not os.path.isfile(self.__file_location):
+            return
+
+        try:
+            with open(self.__file_location, encoding='utf-8') as f:
+                header = f.readline().rstrip('\n')
+                if header != self._header_line():
+                    # submodules or tool strings changed. start over.
+                    self.__is_modified = True
+                    return
+
+                # each line is: hash TAB (HIDE|WAIT) TAB reason
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 3:
+                        continue
+                    self.__entries[parts[0]] = (parts[1] == 'HIDE', parts[2])
+
+        except IOError:
+            print('Warning: unable to read the commit cache file \'' +
+                  self.__file_location + '\'. Continuing without it.')
+            self.__entries = {}
+
+    def lookup(self, commit_hash_str):
+        # returns a (commit_is_hidden, reason_to_hide) tuple, or None
+        return self.__entries.get(commit_hash_str, None)
+
+    def store(self, commit_hash_str, commit_is_hidden, reason_to_hide):
+        self.__entries[commit_hash_str] = (commit_is_hidden, reason_to_hide)
+        self.__is_modified = True
+
+    def save(self):
+        if not self.__is_modified:
+            return
+
+        try:
+            # mode 'w' will TRUNCATE the file
+            text_file = open(self.__file_location, encoding='utf-8', mode='w')
+
+            text_file.write(self._header_line() + '\n')
+
+            for c_hash in sorted(self.__entries):
+                commit_is_hidden, reason_to_hide = self.__entries[c_hash]
+                type_str = 'HIDE' if commit_is_hidden else 'WAIT'
+                text_file.write(c_hash + '\t' + type_str + '\t' +
+                                reason_to_hide + '\n')
+
+            text_file.close()
+            self.__is_modified = False
+
+        except IOError:
+            print('Warning: unable to write the commit cache file \'' +
+                  self.__file_location + '\'.')
@@ -0,0 +1,108 @@
+from __future__ import print_function
+from __future__ import division  # py3 style. division promotes to floating point.
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import marshal
+import os
+import sys
+from io import open
+
+
+class DbBinaryCache(object):
+    """A binary copy of the parsed db file, so that a run can skip re-tokenizing
+    every line of an unchanged db file.
+
+    The text db file is ALWAYS the source of truth. The cache is only used when
+    the size and mtime of the db file still match what the cache recorded.
+    Anything else (a missing file, an older cache format, a different python,
+    a db file that changed) simply means we parse the text file like always.
+
+    The cache is disposable. It should be git-ignored (like the assignments
+    file). Enable it with 'DbBinaryCache=1' in the ini file.
+    """
+
+    def __init__(self, cache_file_location):
+        self.__file_location = cache_file_location
+
+    def _header(self):
+        # marshal formats differ between python versions, so the version is part of the header:
+        return ('@:..finick_code_reviews db_cache v0.00',
+                sys.version_info[0], sys.version_info[1])
+
+    def load(self, db_file_stat):
+        """Returns a dict (see save) when the cache matches db_file_stat. Otherwise None.
+        """
+        if not os.path.isfile(self.__file_location):
+            return None
+
+        try:
+            with open(self.__file_location, mode='rb') as f:
+                # one read, one unmarshal:
+                contents = marshal.loads(f.read())
+
+            # a truncated or foreign file can unmarshal into something else entirely:
+            if not isinstance(contents, tuple) or len(contents) != 7:
+                raise ValueError('not a db cache')
+
+        except (IOError, EOFError, ValueError, TypeError):
+            print('Warning: unable to read the db cache file \'' +
+                  self.__file_location + '\'. Parsing the db file instead.')
+            return None
+
+        if contents[0] != self._header() or contents[1] != db_file_stat:
+            return None
+
+        emails = contents[2]
+
+        # committer and reviewer were saved as positions in the 'emails' list:
+        rows_fields = []
+        for f in contents[3]:
+            rows_fields.append((f[0], emails[f[1]], f[2], f[3], f[4],
+                                emails[f[5]], f[6], f[7], f[8]))
+
+        return {
+            'version_from_fileread': contents[4],
+            'rows_fields': rows_fields,
+            'block_offsets': contents[5],
+            'end_offset': contents[6]
+        }
+
+    def save(self, db_file_stat, version_from_fileread, rows_fields,
+             block_offsets, end_offset):
+        # each item of rows_fields comes from DbRow.get_cache_fields
+        emails = []
+        email_ids = {}
+
+        def id_of(email_str):
+            if email_str not in email_ids:
+                email_ids[email_str] = len(emails)
+                emails.append(email_str)
+            return email_ids[email_str]
+
+        compact_rows = []
+        for f in rows_fields:
+            compact_rows.append((f[0], id_of(f[1]), f[2], f[3], f[4],
+                                 id_of(f[5]), f[6], f[7], f[8]))
+
+        contents = (self._header(), db_file_stat, emails, compact_rows,
+                    version_from_fileread, block_offsets, end_offset)
+
+        # write a temp file and then swap it in, so a reader never sees half a cache:
+        # (deferred import, because db_file imports this module)
+        from finicky.db_file import _replace_file
+
+        temp_location = self.__file_location + '.tmp'
+        try:
+            with open(temp_location, mode='wb') as f:
+                f.write(marshal.dumps(contents))
+
+                # make sure the bytes really are on the disk BEFORE the rename makes them 'the' cache:
+                f.flush()
+                os.fsync(f.fileno())
+
+            _replace_file(temp_location, self.__file_location)
+
+        except (IOError, OSError):
+            print('Warning: unable to write the db cache file \'' +
+                  self.__file_location + '\'.')
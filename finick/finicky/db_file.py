@@ -5,12 +5,53 @@ from __future__ import absolute_import
 
 import finicky.gitting
 from finicky.db_row import DbRow, AssertType_DbRow
+from finicky.db_cache import DbBinaryCache
+from finicky.db_shards import DbShardManifest
 from finicky.error import FinickError
 from finicky.api import _  # part of gettext testing
 
+import datetime
 import os
 from io import open
-import copy
+
+
+def _byte_length_on_disk(text):
+    # io.open (in text mode) writes every '\n' as os.linesep
+    return len(text.encode('utf-8')) + text.count('\n') * (len(os.linesep) - 1)
+
+
+def _replace_file(source_path, target_path):
+    try:
+        # python 3.3 and up. this replaces the target in one step, even on windows:
+        os.replace(source_path, target_path)
+    except AttributeError:
+        # python 2. on windows, rename refuses to overwrite an existing file:
+        if os.name == 'nt' and os.path.exists(target_path):
+            os.remove(target_path)
+        os.rename(source_path, target_path)
+
+
+def _write_text_then_replace(target_path, text):
+    # write everything to a temp file first, and then swap it in. that way a crash
+    # midway through can never leave us with a half-written file.
+    temp_location = target_path + '.tmp'
+
+    # mode 'w' will TRUNCATE the file
+    text_file = open(temp_location, encoding='utf-8', mode='w')
+
+    text_file.write(text)
+
+    # make sure the bytes really are on the disk BEFORE the rename makes them 'the' file:
+    text_file.flush()
+    os.fsync(text_file.fileno())
+    text_file.close()
+
+    _replace_file(temp_location, target_path)
+
+
+def _quarter_label_of(datestr):
+    # datestr is formatted like DbRow.datestr. '2016-05-30_...' gives '2016Q2'
+    return datestr[0:4] + 'Q' + str((int(datestr[5:7]) - 1) // 3 + 1)
 
 
 class _DbRowsCollection(object):
@@ -18,36 +59,194 @@ class _DbRowsCollection(object):
         self.__rows = []
         self.__lookupmap = {}
         self.__lookup_short_hash = {}
+        # whether anything changed since mark_as_unmodified was last called:
+        self.__is_modified = False
+        # rows BEFORE this index are unchanged since mark_as_unmodified. (None when nothing changed)
+        self.__first_dirty_index = None
+        # where (in bytes) each row's block of text began in the file we loaded. a block is
+        # the optional file-comment line plus the row itself (plus any forefront marker).
+        # empty unless set_loaded_block_offsets was called.
+        self.__block_offsets = []
+        self.__loaded_end_offset = 0
+        # with month shards, some rows are not loaded at all. these two stand in for them:
+        # the FIXD todo-refs of those rows (as far as the manifest keeps them), and a
+        # function telling whether any rows are not loaded. (see DbTextFile and DbShardManifest)
+        self.__unloaded_fixd_ref_counts = {}
+        self.__some_rows_are_unloaded = lambda: False
+        self._reset_reminder_indexes()
+
+    def _reset_reminder_indexes(self):
+        # these indexes let find_todos_and_please_requests do work proportional to
+        # ONE debtor's open items, instead of scanning every row of the db.
+        # they are kept current by _index_row/_unindex_row. (keys are id(row), since
+        # a row object stays put in __rows for as long as it is indexed.)
+        self.__order_keys = {}  # id(row) -> number that sorts rows the same as __rows
+        self.__next_tail_key = 0
+        self.__reminders_by_committer = {}  # committer -> { id(row): row } for TODO/PLS rows
+        self.__fixd_ref_counts = {}  # short hash -> how many FIXD rows carry it as a todo-ref
+        # hope-FIXD tags are at least 5 chars (db_row enforces that), so we bucket them by
+        # their first 5 (lowercased) chars:
+        self.__hopefix_prefixes = {}
+
+    def _index_row(self, drow):
+        # note: the if/elif order matters, and mirrors the order of the original scan
+        if drow.rowtype_merits_reminder():
+            rows_of_debtor = self.__reminders_by_committer.setdefault(
+                drow.committer, {})
+            rows_of_debtor[id(drow)] = drow
+
+        elif drow.row_type == drow.TYPE_FIXD:
+            # each todo ref should be length SHORT_H_SIZE
+            for tr in drow.todo_refs:
+                self.__fixd_ref_counts[tr] = self.__fixd_ref_counts.get(tr,
+                                                                        0) + 1
+
+        elif len(drow.hopefix_commastring) > 0:
+            for h in drow.hopefix_commastring.split(','):
+                if len(h) > 0:
+                    self.__hopefix_prefixes.setdefault(h[0:5].lower(),
+                                                       []).append(h.lower())
+
+    def _unindex_row(self, drow):
+        # undo exactly what _index_row did. (call this BEFORE a row changes type)
+        if drow.rowtype_merits_reminder():
+            del self.__reminders_by_committer[drow.committer][id(drow)]
+
+        elif drow.row_type == drow.TYPE_FIXD:
+            for tr in drow.todo_refs:
+                self.__fixd_ref_counts[tr] -= 1
+
+        elif len(drow.hopefix_commastring) > 0:
+            for h in drow.hopefix_commastring.split(','):
+                if len(h) > 0:
+                    self.__hopefix_prefixes[h[0:5].lower()].remove(h.lower())
+
+    def add_unloaded_fixd_refs(self, todo_refs):
+        for tr in todo_refs:
+            self.__unloaded_fixd_ref_counts[
+                tr] = self.__unloaded_fixd_ref_counts.get(tr, 0) + 1
+
+    def remove_unloaded_fixd_refs(self, todo_refs):
+        # (once those rows get loaded, _index_row counts their refs instead)
+        for tr in todo_refs:
+            self.__unloaded_fixd_ref_counts[tr] -= 1
+
+    def set_unloaded_rows_checker(self, checker_func):
+        self.__some_rows_are_unloaded = checker_func
+
+    def _count_fixd_refs_to(self, short_hash):
+        return (self.__fixd_ref_counts.get(short_hash, 0) +
+                self.__unloaded_fixd_ref_counts.get(short_hash, 0))
+
+    def reminder_is_still_open(self, drow):
+        # a TODO/PLS stays open until some FIXD row carries its (short) hash
+        return (drow.rowtype_merits_reminder() and
+                self._count_fixd_refs_to(drow.commithash[0:drow.SHORT_H_SIZE])
+                < 1)
 
     def is_empty(self):
         return len(self.__rows) == 0
 
+    def is_modified(self):
+        return self.__is_modified
+
+    def mark_as_unmodified(self):
+        self.__is_modified = False
+        self.__first_dirty_index = None
+
+    def _mark_dirty_at(self, index):
+        self.__is_modified = True
+        if self.__first_dirty_index is None or index < self.__first_dirty_index:
+            self.__first_dirty_index = index
+
+    def _position_of(self, drow):
+        # rows only ever get appended (and a rebuild, like _replace_whole_collection,
+        # numbers every row again from zero), so a row's order key is its index in __rows:
+        return self.__order_keys[id(drow)]
+
+    def set_loaded_block_offsets(self, block_offsets, end_offset):
+        if len(block_offsets) != len(self.__rows):
+            raise FinickError(
+                'Expected exactly one block offset per row. Got ' + str(len(
+                    block_offsets)) + ' for ' + str(len(self.__rows)) +
+                ' rows.')
+
+        self.__block_offsets = block_offsets
+        self.__loaded_end_offset = end_offset
+
+    def get_loaded_block_offsets(self):
+        return self.__block_offsets
+
+    def get_loaded_end_offset(self):
+        return self.__loaded_end_offset
+
+    def forget_loaded_block_offsets(self):
+        self.__block_offsets = []
+        self.__loaded_end_offset = 0
+
+    def get_unchanged_prefix_length(self):
+        """Returns how many bytes at the start of the loaded file are still exactly what
+        we would write today, or -1 when we have no such knowledge (so write it all).
+        """
+        if len(self.__block_offsets) == 0 or self.__first_dirty_index is None:
+            return -1
+
+        if self.__first_dirty_index >= len(self.__block_offsets):
+            # only brand-new rows at the tail. everything we loaded stays as-is:
+            return self.__loaded_end_offset
+
+        return self.__block_offsets[self.__first_dirty_index]
+
+    def get_first_dirty_index(self):
+        return self.__first_dirty_index
+
     def mark_last_row_as_forefront(self, linetext):
         self.__rows[len(self.__rows) - 1].set_forefront_marker(linetext)
+        self._mark_dirty_at(len(self.__rows) - 1)
 
     def append_drow(self, drow):
         AssertType_DbRow(drow)
+        self._mark_dirty_at(len(self.__rows))
         self.__rows.append(drow)
         self.__lookupmap[drow.commithash] = drow
         self.__lookup_short_hash[drow.commithash[0:drow.SHORT_H_SIZE]] = drow
-
-    def prepend_drow(self, drow):
-        AssertType_DbRow(drow)
-        self.__rows.insert(0, drow)
-        self.__lookupmap[drow.commithash] = drow
-        self.__lookup_short_hash[drow.commithash[0:drow.SHORT_H_SIZE]] = drow
+        self.__order_keys[id(drow)] = self.__next_tail_key
+        self.__next_tail_key += 1
+        self._index_row(drow)
 
     def _replace_whole_collection(self, new_list):
+        self._mark_dirty_at(0)
         self.__rows = []
         self.__lookupmap = {}
         self.__lookup_short_hash = {}
+        self._reset_reminder_indexes()
         for nr in new_list:
             self.append_drow(nr)
 
-    def write_to_diskfile(self, text_file):
+    def iterate_rows(self):
+        # rows in db order. (do not add or remove rows while iterating)
+        return iter(self.__rows)
+
+    def replace_rows_keeping_state(self, new_list):
+        # for putting more rows in place (like rows of a month shard that got loaded).
+        # new_list must hold every current row. nothing about the rows themselves
+        # changes, so the collection stays unmodified if it was unmodified.
+        was_modified = self.__is_modified
+        self._replace_whole_collection(new_list)
+        if not was_modified:
+            self.mark_as_unmodified()
+
+    def format_rows_from(self, starting_row):
+        # a list holding one block of text per row
+        return [r.format_for_diskfile() for r in self.__rows[starting_row:]]
+
+    def write_to_diskfile(self, text_file, starting_row=0):
         # the_file is expected to be a TextIOBase (from io)
-        for r in self.__rows:
-            r.write_to_diskfile(text_file)
+        # format everything into one buffer, then hand it over in a single write:
+        text_file.write(''.join(self.format_rows_from(starting_row)))
+
+    def get_cache_fields_of_all_rows(self):
+        return [r.get_cache_fields() for r in self.__rows]
 
     def contains_this_commit(self, commithash_str):
         return commithash_str in self.__lookupmap
@@ -55,10 +254,19 @@ class _DbRowsCollection(object):
     def find_commit_prestored(self, commithash_str):
         return self.__lookupmap.get(commithash_str, None)
 
+    def get_committers(self):
+        results = []
+        for r in self.__rows:
+            if not r.committer in results:
+                results.append(r.committer)
+
+        return results
+
     def _configured_strategy_says_to_assign_this_row(self, finick_config,
                                                      dbrow):
-        # when running "start.py -n" (or -d), avoid creating any assignments at all:
-        if finick_config.opt_nosession or finick_config.opt_charts:
+        # when running "start.py -n" (or -d, or -a), avoid creating any assignments at all:
+        if (finick_config.opt_nosession or finick_config.opt_charts or
+                finick_config.opt_alltodos):
             return False
         elif len(finick_config.opt_requests) > 0:
             for req in finick_config.opt_requests:
@@ -80,109 +288,217 @@ class _DbRowsCollection(object):
                 if self._configured_strategy_says_to_assign_this_row(
                     finick_config, r):
                     r.assign_for_current_review_session(finick_config.reviewer)
-                    # make a deep copy, so that nothing that edits assignments can edit our __rows:
-                    results.append(copy.deepcopy(r))
+                    self._mark_dirty_at(self._position_of(r))
+                    # hand out a frozen snapshot, so that nothing that edits assignments can edit our __rows:
+                    results.append(r.frozen_snapshot())
 
         return results
 
-    def get_mapped_human_commits(self, finick_config):
-        """For now this does week-by-week aggregation (using prior_monday).
-Eventually we will likely need month-by-month and other variations.
-        """
-
-        results = {}
-        all_devs = []
-
-        for r in self.__rows:
-            # exclude commits that are 'machine-made' (done by finick):
-            if not r.row_was_machine_created():
-                map_key = r.prior_monday
-                if not map_key in results:
-                    results[map_key] = []
-
-                # make a deep copy, so that nothing that edits assignments can edit our __rows:
-                results[map_key].append(copy.deepcopy(r))
-                if r.committer == '' and r.reviewer == '':
-                    raise FinickError(
-                        'Row is missing both the reviewer and committer.')
-                if (r.committer != '') and (not r.committer in all_devs):
-                    all_devs.append(r.committer)
-                if (r.reviewer != '') and (not r.reviewer in all_devs):
-                    all_devs.append(r.reviewer)
-
-        return results, all_devs
-
     def find_then_reverse_assignments(self, finick_config):
         """This function should always do 'the opposite' of find_then_mark_then_return_assignments
         """
         for r in self.__rows:
             if r.row_type == r.TYPE_NOW:
                 r.cancel_assignment_for_current_review_session()
+                self._mark_dirty_at(self._position_of(r))
 
     def find_todos_and_please_requests(self, email_of_debtor):
         # we need to care about TYPE_TODO and TYPE_PLS.
-        # find rows of those types where the *committer* is the same as current session driver
-        rough_results = []
-        cancelled_hashes = []
-        suppression_candidates = []
+        # find rows of those types where the *committer* is the same as current session driver.
+        # (the indexes already hold every TODO/PLS per committer, every FIXD todo-ref,
+        # and every hope-FIXD tag. see _index_row)
+        rows_of_debtor = self.__reminders_by_committer.get(email_of_debtor, {})
 
-        for r in self.__rows:
-            if r.rowtype_merits_reminder():
-                for_me = r.committer == email_of_debtor
-                if for_me:
-                    rough_results.append(copy.deepcopy(r))
+        # keep the same order the rows have in the db file:
+        rough_results = sorted(rows_of_debtor.values(),
+                               key=lambda r: self.__order_keys[id(r)])
 
-            elif r.row_type == r.TYPE_FIXD:
-                # each todo ref should be length SHORT_H_SIZE
-                cancelled_hashes += r.todo_refs
+        results = []
 
-            elif len(r.hopefix_commastring) > 0:
+        for r in rough_results:
+            # we expect the todo refs to always be length SHORT_H_SIZE
+            if self.reminder_is_still_open(r):
+                snapshot = r.frozen_snapshot()
+                results.append(snapshot)
+                # add an attribute:
+                snapshot.has_pending_hopefix = False
                 # hopefix comments indicate a proposed FIXD is already committed.
                 # (earlier parsing code also already should have checked that
                 # the proposed fix is AWAITING REVIEW. if a proposed fix was
                 # reviewed but rejected, then it will _not_ appear in hopefix_commastring)
-                hashes = r.hopefix_commastring.split(',')
-                for h in hashes:
-                    if len(h) > 0:
-                        suppression_candidates.append(h)
+                lowered_hash = r.commithash.lower()
+                for sc in self.__hopefix_prefixes.get(lowered_hash[0:5], []):
+                    if lowered_hash.startswith(sc):
+                        snapshot.has_pending_hopefix = True
+                        break
 
-        results = []
+        return results
 
-        for r in rough_results:
-            # we expect the todo refs to always be length SHORT_H_SIZE
-            if r.commithash[0:r.SHORT_H_SIZE] not in cancelled_hashes:
-                results.append(r)
-                # add an attribute:
-                r.has_pending_hopefix = False
-                # uh-oh. nested for loops! yikes! the excuse (for now): we expect sc to be a SHORT list:
-                for sc in suppression_candidates:
-                    if r.commithash.lower().startswith(sc.lower()):
-                        r.has_pending_hopefix = True
+    def find_todos_and_please_requests_of_everyone(self):
+        # one trip through the reminder index gives every debtor. the keys of the
+        # returned map are committer emails, and only debtors with open items appear:
+        results = {}
+        for debtor in self.__reminders_by_committer:
+            todos = self.find_todos_and_please_requests(debtor)
+            if len(todos) > 0:
+                results[debtor] = todos
 
         return results
 
-    def add_new_commits(self, incoming_rows):
+    def get_anchor_candidates(self):
+        """Returns commit hashes (best candidate first) that an incremental git
+        history walk could start from: the newest row, then the newest forefront row.
+
+        RVRT rows never count. merge_completed_assignments appends those without any
+        git walk, and a revert commit can sit on top of commits that no walk has stored
+        yet (like a session-start HIDE commit that was skipped as a lone HIDE row).
+        """
+        candidates = []
+
+        for r in reversed(self.__rows):
+            if r.row_type != r.TYPE_RVRT:
+                candidates.append(r.commithash)
+                break
+
+        for r in reversed(self.__rows):
+            if r.row_type != r.TYPE_RVRT and r.has_forefront_marker():
+                if r.commithash not in candidates:
+                    candidates.append(r.commithash)
+                break
+
+        return candidates
+
+    def _index_where_purging_must_stop(self):
+        # rows at or after this index are never purged. that means: the newest
+        # forefront row and everything after it, and always the newest row.
+        # (keeping the newest row keeps get_anchor_candidates useful.)
+        stop_at = len(self.__rows) - 1
+
+        for i in range(stop_at - 1, -1, -1):
+            if self.__rows[i].has_forefront_marker():
+                stop_at = i
+                break
+
+        return stop_at
+
+    def take_out_rows_reviewed_before(self, cutoff_datestr):
+        """Removes (and returns, in db order) the rows that can be purged: rows older than
+        cutoff_datestr (formatted like DbRow.datestr) that sit before the forefront.
+
+        A row still awaiting review (WAIT/NOW) is never purged, and neither is an open TODO/PLS. A FIXD row stays as long as any TODO/PLS it closes
+        stays, because purging it would make that TODO/PLS look open again.
+        """
+        stop_at = self._index_where_purging_must_stop()
+
+        purge_ids = set()
+        fixd_rows = []
+
+        for r in self.__rows[0:stop_at]:
+            if r.datestr >= cutoff_datestr or r.still_needs_review():
+                continue
+
+            if r.rowtype_merits_reminder():
+                # only a closed TODO/PLS (some FIXD row carries its hash) may go:
+                if not self.reminder_is_still_open(r):
+                    purge_ids.add(id(r))
+            elif r.row_type == r.TYPE_FIXD:
+                # decided below, once we know which TODO/PLS rows go
+                fixd_rows.append(r)
+            else:
+                # OK, OOPS, HIDE, RVRT
+                purge_ids.add(id(r))
+
+        for r in fixd_rows:
+            keeps_a_todo_closed = False
+            for tr in r.todo_refs:
+                closed_row = self.__lookup_short_hash.get(tr, None)
+                if closed_row is not None and id(closed_row) not in purge_ids:
+                    keeps_a_todo_closed = True
+                    break
+                if closed_row is None and self.__some_rows_are_unloaded():
+                    # (the TODO/PLS could be in a month shard that is not loaded. keep the FIXD to be safe)
+                    keeps_a_todo_closed = True
+                    break
+
+            if not keeps_a_todo_closed:
+                purge_ids.add(id(r))
+
+        if len(purge_ids) == 0:
+            return []
+
+        purged = []
+        kept = []
+        for r in self.__rows:
+            if id(r) in purge_ids:
+                purged.append(r)
+            else:
+                kept.append(r)
+
+        self._replace_whole_collection(kept)
+
+        return purged
+
+    def add_new_commits(self, incoming_rows, is_partial_history=False):
         # incoming_rows is a list of DbRow objects. it is a PYTHON LIST! not a _DbRowsCollection!
         # IMPORTANT: 'incoming_rows' is NOT JUST new content. it is EXPECTED to overlap with current content in __rows
+        # (unless is_partial_history is True. then incoming_rows is only the
+        #  history walked since some anchor commit that we already have, and
+        #  it MAY still overlap, but it never carries all of the older rows.)
 
         if self.is_empty():
             # we must have initially read from an empty file, so now we incorporate *all* incoming commits
             for ir in incoming_rows:
                 self.append_drow(ir)
+        elif is_partial_history:
+
+            fresh_rows = []
+
+            for ir in incoming_rows:
+                if not self.contains_this_commit(ir.commithash):
+                    fresh_rows.append(ir)
+
+            # same special case as the full walk below: we ignore updates if there is only
+            # 1 new row and it is a HIDE type. (the anchor is never a row the walk did not
+            # give us, so a skipped HIDE row simply shows up again in the next walk)
+            if len(fresh_rows) == 1 and fresh_rows[0].row_type == fresh_rows[
+                    0].TYPE_HIDE:
+                fresh_rows = []
+
+            # everything before the anchor is already in __rows (in topo order),
+            # so the new commits simply go on the end (also in topo order).
+            for fr in fresh_rows:
+                self.append_drow(fr)
         else:
 
             count_fresh = 0
             type_was_hide = False
             newrows_i = -1
 
+            # while we go, check whether the rows we already have show up in the
+            # very same order (with none missing). usually they do, and then the new
+            # rows only need to be spliced in. (see _splice_in_fresh_rows)
+            same_order_so_far = True
+            ours_i = 0
+            first_fresh_i = -1
+
             for ir in incoming_rows:
                 newrows_i += 1
                 prior_db_copy = self.find_commit_prestored(ir.commithash)
                 if prior_db_copy != None:
                     incoming_rows[newrows_i] = prior_db_copy
+                    if same_order_so_far:
+                        same_order_so_far = (
+                            ours_i < len(self.__rows) and
+                            self.__rows[ours_i] is prior_db_copy)
+                        ours_i += 1
                 else:
                     count_fresh += 1
                     type_was_hide = ir.row_type == ir.TYPE_HIDE
+                    if first_fresh_i == -1:
+                        first_fresh_i = newrows_i
+
+            # (a row of ours that git no longer gave us means the history got rewritten)
+            same_order = same_order_so_far and ours_i == len(self.__rows)
 
             any_significant_change = True
 
@@ -192,7 +508,31 @@ Eventually we will likely need month-by-month and other variations.
                 any_significant_change = False
 
             if any_significant_change:
-                self._replace_whole_collection(incoming_rows)
+                if not same_order:
+                    self._replace_whole_collection(incoming_rows)
+                elif count_fresh > 0:
+                    self._splice_in_fresh_rows(incoming_rows, first_fresh_i)
+                # (else: the very same rows in the very same order. nothing to do)
+
+    def _splice_in_fresh_rows(self, new_list, first_fresh_i):
+        # new_list holds all of our rows, in our order, plus some fresh rows. everything
+        # before first_fresh_i is exactly what we already have, so we leave that alone.
+        # the rest is replaced, but only the fresh rows need new lookup/reminder entries.
+        # (when the fresh rows all come at the end, this is O(fresh rows))
+        self._mark_dirty_at(first_fresh_i)
+        self.__rows[first_fresh_i:] = new_list[first_fresh_i:]
+
+        for i in range(first_fresh_i, len(self.__rows)):
+            drow = self.__rows[i]
+            if id(drow) not in self.__order_keys:
+                AssertType_DbRow(drow)
+                self.__lookupmap[drow.commithash] = drow
+                self.__lookup_short_hash[drow.commithash[0:drow.
+                                                         SHORT_H_SIZE]] = drow
+                self._index_row(drow)
+            self.__order_keys[id(drow)] = i
+
+        self.__next_tail_key = len(self.__rows)
 
     def short_commithash_is_known_in_collection(self, commithash_str):
         dr = DbRow.dummyinstance()
@@ -203,13 +543,17 @@ Eventually we will likely need month-by-month and other variations.
 
         return commithash_str in self.__lookup_short_hash
 
+    def find_commit_by_short_hash(self, commithash_str):
+        # the loaded row whose hash starts with these SHORT_H_SIZE chars (or None)
+        return self.__lookup_short_hash.get(commithash_str, None)
+
     def _map_summary_rows_by_author(self, summary_rows):
         the_map = {}
         for sr in summary_rows:
             if sr.committer not in the_map:
                 the_map[sr.committer] = []
 
-            # each 'sr' is already a deep-copy, so no need to deepcopy here:
+            # each 'sr' is already a frozen snapshot, so no need to copy here:
             the_map[sr.committer].append(sr)
 
         return the_map, len(summary_rows)
@@ -217,7 +561,7 @@ Eventually we will likely need month-by-month and other variations.
     def merge_completed_assignments(self, assign_file, finick_config):
         AssertType_DbTextFile(assign_file)
 
-        assign_rows = assign_file._DbTextFile__rowcollection._DbRowsCollection__rows
+        assign_rows = assign_file.iterate_rows()
 
         summary_rows = []
 
@@ -231,15 +575,21 @@ Eventually we will likely need month-by-month and other variations.
                     ar.commithash)
 
             # now we work with 'our_row' and 'ar'
+            self._mark_dirty_at(self._position_of(our_row))
+
+            # the merge can change the row type, so take the row out of the reminder
+            # indexes now and put it back once the merge is done:
+            self._unindex_row(our_row)
 
             # if 'ar' is still in row_type 'NOW', then put it back to 'WAIT'
             # other valid values for ar type: OK, FIXD, TODO, PLS, OOPS
             if ar.row_type != ar.TYPE_OOPS:
                 work_count = our_row.merge_with_completed_assignment_all_cases_except_OOPS(
                     ar, self.short_commithash_is_known_in_collection)
+                self._index_row(our_row)
 
                 if work_count > 0:
-                    summary_rows.append(copy.deepcopy(ar))
+                    summary_rows.append(ar.frozen_snapshot())
 
             elif ar.row_type == ar.TYPE_OOPS:
                 # OOPS is the tricky case. we try a clean revert. if it fails, we use TODO instead.
@@ -254,6 +604,7 @@ Eventually we will likely need month-by-month and other variations.
                 # the merge function will decide (based on reverthash) whether to merge as TODO or OOPS
                 new_row = our_row.merge_OOPS_row(
                     ar, reverthash, reason_to_hide, finick_config.reviewer)
+                self._index_row(our_row)
 
                 if None != new_row:
                     # if the merge returned a new row, then add it
@@ -267,7 +618,7 @@ Eventually we will likely need month-by-month and other variations.
                             ' did not revert, so this row should show TODO instead of OOPS')
 
                 # either way (as OOPS or as TODO), this was one review:
-                summary_rows.append(copy.deepcopy(ar))
+                summary_rows.append(ar.frozen_snapshot())
 
             else:
                 raise FinickError(
@@ -321,6 +672,17 @@ class DbTextFile(object):
         self.__finick_config = None
         self.__is_ok = False
         self.__version_from_fileread = -1  # later code RELIES on this -1 as a flag
+        self.__version_line_was_read = False
+        self.__loaded_file_stat = None  # (size, mtime) of the db file when we read it
+        self.__db_cache = None  # a DbBinaryCache, but only when the ini file enables it
+        # rows that purge_older_reviewed_commits took out, waiting for flush_back_to_disk to archive them:
+        self.__rows_awaiting_archive = []
+        # with 'DbShardByMonth=1' the db file holds a DbShardManifest, and the rows live in month shards:
+        self.__manifest = None
+        self.__loaded_months = set()
+        self.__shard_of_commit = {}  # commit hash -> the month shard the row was loaded from
+        self.__unloaded_fixd_refs_of_month = {}  # what _absorb_manifest told the collection
+        self.__is_migrating_to_shards = False
         self.__rowcollection = _DbRowsCollection()
 
         if False == is_dummy:
@@ -373,69 +735,50 @@ class DbTextFile(object):
             # forefront markers mark the commit from the PREVIOUS row.
 
             try:
-                with open(expected_db, encoding='utf-8') as f:
-                    # it opened without exception, so store this location for later file-save operations:
-                    self.__file_location = expected_db
-
-                    file_comments_waiting = ''
-
-                    for line in f:
-                        #print(_('someline')) # bogus test line. was part of gettext testing
-                        linetext = line.rstrip().lstrip()
-                        if len(linetext) == 0:
-                            continue
-
-                        is_comment = linetext.startswith(';')
-                        is_versioninfo = linetext.startswith(
-                            '@:..finick_code_reviews')
-                        is_forefrontmark = linetext.startswith(
-                            '##__forefront__##')
-
-                        if is_versioninfo:
-                            if self.__version_from_fileread != -1:
-                                raise FinickError(
-                                    'Once we set the value version_from_fileread,'
-                                    ' no file lines should match is_versioninfo again!')
-
-                            self._parse_version_from_fileread(linetext)
-
-                        elif is_comment:
-                            if len(file_comments_waiting) > 0:
-                                raise FinickError(
-                                    'Found another file-comment when we already had one pending.'
-                                    ' Only a maximum of one consecutive file-comment line is allowed.')
-
-                            file_comments_waiting = linetext
-
-                        elif is_forefrontmark:
-                            if self.__rowcollection.is_empty():
-                                print(
-                                    'Warning: found a forefront marker without any preceding row to attach it to.')
-                            else:
-                                self.__rowcollection.mark_last_row_as_forefront(
-                                    linetext)
-
-                        else:
-                            if self.__version_from_fileread == -1:
-                                print(
-                                    'Warning: no version string before content. Assuming version 0.00')
-                                self.__version_from_fileread = 0
-
-                            drow = DbRow.create_from_string(
-                                linetext, file_comments_waiting)
-                            file_comments_waiting = ''
-                            if is_session_starting and drow.row_type == drow.TYPE_NOW:
-                                raise FinickError(
-                                    'The session is not yet fully initialized. Therefore, we cannot have \'NOW\' rows.'
-                                    'Bad row: ' + linetext)
-
-                            if reverse_the_rows:
-                                self.__rowcollection.prepend_drow(drow)
-                            else:
-                                self.__rowcollection.append_drow(drow)
-
-                    # if we made it this far without exceptions:
-                    is_ok = True
+                # the binary cache only ever stands in for the db file itself. (not the assignments file)
+                is_the_db = (not reverse_the_rows and expected_db ==
+                             finick_config.get_db_file_fullname_fullpath())
+                # (with month shards, the db file is only a small manifest. nothing worth caching)
+                uses_cache = (is_the_db and finick_config.use_db_binary_cache
+                              and not finick_config.use_month_shards)
+
+                if uses_cache and self._absorb_binary_cache(
+                        finick_config, expected_db, is_session_starting):
+                    # the cache matched the file, so there is no text to parse.
+                    raw_bytes = None
+                else:
+                    with open(expected_db, mode='rb') as f:
+                        # it opened without exception, so store this location for later file-save operations:
+                        self.__file_location = expected_db
+
+                        # read it all in one go, then parse:
+                        raw_bytes = f.read()
+
+                if raw_bytes is not None and is_the_db and raw_bytes.lstrip(
+                ).startswith(DbShardManifest.VERSION_PREFIX.encode('utf-8')):
+                    self._absorb_manifest(finick_config,
+                                          raw_bytes.decode('utf-8'),
+                                          is_session_starting)
+
+                elif raw_bytes is not None:
+                    self._absorb_text_of_file(raw_bytes, is_session_starting,
+                                              reverse_the_rows)
+
+                    if is_the_db and finick_config.use_month_shards:
+                        # a plain db file, but the ini file now asks for month shards.
+                        # every row is loaded, so the next flush can write out every shard.
+                        # (the last row of a plain db file is where the last walk ended)
+                        self.__manifest = DbShardManifest()
+                        if not self.__rowcollection.is_empty():
+                            self.__manifest.set_tip(
+                                self.__rowcollection.get_anchor_candidates()[0])
+                        self.__is_migrating_to_shards = True
+
+                    if uses_cache:
+                        self._save_binary_cache()
+
+                # if we made it this far without exceptions:
+                is_ok = True
 
             except FinickError:
                 # here is where we intend to catch our own parsing violations from db_row
@@ -453,14 +796,282 @@ class DbTextFile(object):
             # in that case, we may as well say the file is in 'our version' format:
             self.__version_from_fileread = self.__CURR_FILE_VER
 
+        # whatever we just loaded is (by definition) identical to what is on disk:
+        self.__rowcollection.mark_as_unmodified()
+
         self.__is_ok = is_ok
         # since all went well, store the config for use by other member functions later:
         self.__finick_config = finick_config
 
+    def _absorb_text_of_file(self, raw_bytes, is_session_starting,
+                             reverse_the_rows):
+        text = raw_bytes.decode('utf-8')
+        line_offsets = None
+
+        if raw_bytes.count(b'\r') == raw_bytes.count(b'\r\n'):
+            # note the byte offset where each line starts, so that flush_back_to_disk
+            # can later keep the unchanged start of the file as-is.
+            # (utf-8 never uses the newline byte inside a multi-byte character)
+            line_offsets = []
+            pos = 0
+            for byte_line in raw_bytes.split(b'\n'):
+                line_offsets.append(pos)
+                pos += len(byte_line) + 1
+        else:
+            # old-style lone '\r' line endings. read those the way io.open would,
+            # and skip the offsets. (this file then simply gets written in full)
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        block_offsets = self._absorb_lines(
+            text.split('\n'), is_session_starting, reverse_the_rows,
+            line_offsets)
+
+        if block_offsets is not None:
+            self.__rowcollection.set_loaded_block_offsets(block_offsets,
+                                                          len(raw_bytes))
+            self.__loaded_file_stat = self._stat_of_db_file()
+
+    def _absorb_manifest(self, finick_config, text, is_session_starting):
+        if not finick_config.use_month_shards:
+            raise FinickError(
+                'The db file \'' + self.__file_location + '\' is a manifest of '
+                'month shards, but the ini file does not set DbShardByMonth=1.')
+
+        # (the shards are found via the config. normally we only store it once loading is done)
+        self.__finick_config = finick_config
+        self.__manifest = DbShardManifest()
+        self.__manifest.absorb_text(text)
+        self.__version_from_fileread = 0
+        self.__version_line_was_read = True
+
+        # until a shard is loaded, the manifest answers for its rows:
+        for month in self.__manifest.get_months():
+            refs = list(self.__manifest.get_fixd_refs(month))
+            self.__unloaded_fixd_refs_of_month[month] = refs
+            self.__rowcollection.add_unloaded_fixd_refs(refs)
+        self.__rowcollection.set_unloaded_rows_checker(
+            self._has_unloaded_shards)
+
+        # the open shards hold every row that a session (or a reminder) could touch.
+        # the newest shard is where new commits go, so it always gets loaded, too.
+        months = self.__manifest.get_open_months()
+        newest = self.__manifest.get_newest_month()
+        if newest is not None and newest not in months:
+            months.append(newest)
+        self._load_shards(months, is_session_starting)
+
+    def _read_rows_of_plain_db_file(self, filename_w_fullpath,
+                                    is_session_starting=False):
+        # for the archive files and the month shards. these look just like a db file,
+        # but we only want their rows. (with no git checks, no cache, no offsets)
+        plain_file = DbTextFile.dummyinstance()
+        with open(filename_w_fullpath, encoding='utf-8', mode='r') as f:
+            plain_file._absorb_lines(f.read().split('\n'),
+                                     is_session_starting, False)
+
+        return list(plain_file.iterate_rows())
+
+    def _load_shards(self, months, is_session_starting=False):
+        # loading rows is not a change to the db. (the shards on disk already have them)
+        months = [m for m in months if m not in self.__loaded_months]
+        if len(months) == 0:
+            return
+
+        rows_of_month = {}
+        for month in months:
+            rows_of_month[month] = self._read_rows_of_plain_db_file(
+                self.__finick_config.get_shard_file_fullname_fullpath(month),
+                is_session_starting)
+
+        # the shards (oldest month first) are the db in db order. so the rows of a shard
+        # must go in AFTER those of older shards, and BEFORE those of newer ones. rows
+        # that came from no shard at all are new since we loaded, so they stay at the end.
+        loaded_rows_of_month = {}
+        rows_from_no_shard = []
+        for r in self.__rowcollection.iterate_rows():
+            month = self.__shard_of_commit.get(r.commithash, None)
+            if month is None:
+                rows_from_no_shard.append(r)
+            else:
+                loaded_rows_of_month.setdefault(month, []).append(r)
+
+        all_rows = []
+        for month in self.__manifest.get_months():
+            if month in rows_of_month:
+                for r in rows_of_month[month]:
+                    self.__shard_of_commit[r.commithash] = month
+                all_rows.extend(rows_of_month[month])
+            else:
+                all_rows.extend(loaded_rows_of_month.get(month, []))
+        all_rows.extend(rows_from_no_shard)
+
+        self.__rowcollection.replace_rows_keeping_state(all_rows)
+
+        for month in months:
+            # (once those rows are loaded, the collection counts their refs itself)
+            self.__rowcollection.remove_unloaded_fixd_refs(
+                self.__unloaded_fixd_refs_of_month.pop(month, []))
+            self.__loaded_months.add(month)
+
+    def _load_every_shard(self):
+        if self.__manifest is None:
+            return
+
+        self._load_shards(self.__manifest.get_months())
+
+    def _has_unloaded_shards(self):
+        if self.__manifest is None:
+            return False
+
+        for month in self.__manifest.get_months():
+            if month not in self.__loaded_months:
+                return True
+
+        return False
+
+    def _absorb_binary_cache(self, finick_config, expected_db,
+                             is_session_starting):
+        # returns True if the rows came from the cache. False means: go parse the text file.
+        self.__file_location = expected_db
+        self.__db_cache = DbBinaryCache(
+            finick_config.get_dbcache_file_fullname_fullpath())
+
+        file_stat = self._stat_of_db_file()
+        cached = self.__db_cache.load(file_stat)
+        if cached is None:
+            return False
+
+        self.__version_from_fileread = cached['version_from_fileread']
+        self.__version_line_was_read = True
+
+        for fields in cached['rows_fields']:
+            drow = DbRow.create_from_cache_fields(fields)
+            if is_session_starting and drow.row_type == drow.TYPE_NOW:
+                raise FinickError(
+                    'The session is not yet fully initialized. Therefore, we cannot have \'NOW\' rows.'
+                    'Bad row: ' + drow.commithash)
+
+            self.__rowcollection.append_drow(drow)
+
+        self.__rowcollection.set_loaded_block_offsets(cached['block_offsets'],
+                                                      cached['end_offset'])
+        self.__loaded_file_stat = file_stat
+        return True
+
+    def _save_binary_cache(self):
+        # we only cache a file that we fully understand: one with a version line and known offsets
+        if self.__db_cache is None or not self.__version_line_was_read:
+            return
+        if self.__loaded_file_stat is None:
+            return
+
+        self.__db_cache.save(
+            self.__loaded_file_stat, self.__version_from_fileread,
+            self.__rowcollection.get_cache_fields_of_all_rows(),
+            self.__rowcollection.get_loaded_block_offsets(),
+            self.__rowcollection.get_loaded_end_offset())
+
+    def _absorb_lines(self,
+                      lines,
+                      is_session_starting,
+                      reverse_the_rows,
+                      line_offsets=None):
+        # 'lines' is any iterable of text lines from a db file (or an assignments file).
+        # when we also get 'line_offsets' (the byte offset of each line), we return a list
+        # holding the byte offset where each row's block of text begins. otherwise we return None.
+        file_comments_waiting = ''
+
+        block_offsets = None
+        if line_offsets is not None and not reverse_the_rows:
+            block_offsets = []
+        offset_of_comment = 0
+
+        # when reversing, we gather the rows in file order and hand them over backwards
+        # at the very end. (inserting each row at the front of the list would be O(n^2))
+        rows_to_reverse = []
+
+        for line_i, line in enumerate(lines):
+            #print(_('someline')) # bogus test line. was part of gettext testing
+            linetext = line.strip()
+            if len(linetext) == 0:
+                continue
+
+            # nearly every line is a plain row. peek at the first char before doing any startswith work:
+            first_char = linetext[0]
+
+            is_comment = first_char == ';'
+            is_versioninfo = first_char == '@' and linetext.startswith(
+                '@:..finick_code_reviews')
+            is_forefrontmark = first_char == '#' and linetext.startswith(
+                '##__forefront__##')
+
+            if is_versioninfo:
+                if self.__version_from_fileread != -1:
+                    raise FinickError(
+                        'Once we set the value version_from_fileread,'
+                        ' no file lines should match is_versioninfo again!')
+
+                self._parse_version_from_fileread(linetext)
+
+            elif is_comment:
+                if len(file_comments_waiting) > 0:
+                    raise FinickError(
+                        'Found another file-comment when we already had one pending.'
+                        ' Only a maximum of one consecutive file-comment line is allowed.')
+
+                file_comments_waiting = linetext
+                if block_offsets is not None:
+                    offset_of_comment = line_offsets[line_i]
+
+            elif is_forefrontmark:
+                if reverse_the_rows and len(rows_to_reverse) > 0:
+                    rows_to_reverse[-1].set_forefront_marker(linetext)
+                elif self.__rowcollection.is_empty() or reverse_the_rows:
+                    print(
+                        'Warning: found a forefront marker without any preceding row to attach it to.')
+                else:
+                    self.__rowcollection.mark_last_row_as_forefront(linetext)
+
+            else:
+                if self.__version_from_fileread == -1:
+                    print(
+                        'Warning: no version string before content. Assuming version 0.00')
+                    self.__version_from_fileread = 0
+
+                drow = DbRow.create_from_string(linetext,
+                                                file_comments_waiting)
+
+                if block_offsets is not None:
+                    if file_comments_waiting != '':
+                        block_offsets.append(offset_of_comment)
+                    else:
+                        block_offsets.append(line_offsets[line_i])
+
+                file_comments_waiting = ''
+                if is_session_starting and drow.row_type == drow.TYPE_NOW:
+                    raise FinickError(
+                        'The session is not yet fully initialized. Therefore, we cannot have \'NOW\' rows.'
+                        'Bad row: ' + linetext)
+
+                if reverse_the_rows:
+                    rows_to_reverse.append(drow)
+                else:
+                    self.__rowcollection.append_drow(drow)
+
+        for drow in reversed(rows_to_reverse):
+            self.__rowcollection.append_drow(drow)
+
+        return block_offsets
+
+    def _stat_of_db_file(self):
+        st = os.stat(self.__file_location)
+        return (st.st_size, st.st_mtime)
+
     def _parse_version_from_fileread(self, linetext):
         # this is the only thing we can handle in our 0.0 version:
         if linetext == self.__CURR_VERSION_STRING:
             self.__version_from_fileread = 0
+            self.__version_line_was_read = True
         else:
             err_msg = str('Current version of finick db_file (' + str(
                 self.__CURR_FILE_VER) + ') cannot parse file version: ' +
@@ -475,21 +1086,235 @@ class DbTextFile(object):
                 'It seems we incremented __CURR_FILE_VER without a plan to upgrade older files!'
                 ' Add implementation here, please!')
 
-        # mode 'w' will TRUNCATE the file
-        text_file = open(self.__file_location, encoding='utf-8', mode='w')
-
-        # (first line should always be file version info).
-        text_file.write(self.__CURR_VERSION_STRING + '\n')
-
-        self.__rowcollection.write_to_diskfile(text_file)
-
-        text_file.close()
+        # when the remote had nothing new (and no rows were touched), then
+        # rewriting the file would only reproduce what is already there:
+        if (self.__version_line_was_read and
+                not self.__rowcollection.is_modified() and
+                not self.__is_migrating_to_shards):
+            return
+
+        # archive first. if we crash in between, a row ends up in both files (and readers
+        # of the archives skip such repeats) rather than in neither.
+        if len(self.__rows_awaiting_archive) > 0:
+            self._write_rows_awaiting_archive()
+
+        if self.__manifest is not None:
+            self._flush_shards_to_disk()
+            return
+
+        # when only some rows changed (say, a few WAIT rows became NOW, or new commits
+        # landed at the end), everything before the first changed row can be copied over
+        # byte-for-byte instead of being formatted again. this also keeps git diffs small.
+        # (we only trust our offsets if nobody touched the file since we read it)
+        prefix_length = self.__rowcollection.get_unchanged_prefix_length()
+        can_keep_prefix = (prefix_length > 0 and self.__version_line_was_read and
+                           self.__loaded_file_stat == self._stat_of_db_file())
+        if can_keep_prefix:
+            with open(self.__file_location, mode='rb') as f:
+                prefix_text = f.read(prefix_length).decode('utf-8')
+
+            # we write in text mode below, which puts back whatever line ending this platform uses:
+            prefix_text = prefix_text.replace('\r\n', '\n')
+            if not prefix_text.endswith('\n'):
+                prefix_text += '\n'
+
+            first_row_to_write = self.__rowcollection.get_first_dirty_index()
+        else:
+            # (first line should always be file version info).
+            prefix_text = self.__CURR_VERSION_STRING + '\n'
+            first_row_to_write = 0
+
+        # format everything into one buffer, then hand it over in a single write:
+        blocks = self.__rowcollection.format_rows_from(first_row_to_write)
+        _write_text_then_replace(self.__file_location,
+                                 prefix_text + ''.join(blocks))
+
+        # the disk now matches our rows. work out where each row's block begins in the
+        # new file, so that a later flush (and the binary cache) can rely on it, too.
+        # (if copying the prefix changed its line endings, those old offsets are useless)
+        pos = _byte_length_on_disk(prefix_text)
+        if first_row_to_write == 0 or pos == prefix_length:
+            new_offsets = self.__rowcollection.get_loaded_block_offsets(
+            )[0:first_row_to_write]
+            for b in blocks:
+                new_offsets.append(pos)
+                pos += _byte_length_on_disk(b)
+
+            self.__rowcollection.set_loaded_block_offsets(new_offsets, pos)
+            self.__loaded_file_stat = self._stat_of_db_file()
+        else:
+            self.__rowcollection.forget_loaded_block_offsets()
+            self.__loaded_file_stat = None
+
+        # (a full write always starts with the version line. a partial one kept it from before)
+        self.__version_line_was_read = True
+        self.__rowcollection.mark_as_unmodified()
+
+        self._save_binary_cache()
+
+    def _rows_by_shard(self):
+        # which shard each loaded row belongs in. a shard holds an unbroken stretch of
+        # rows (in db order), so a row goes in the shard of the newest month seen so far:
+        # its own shard (or, for a new row, its own month), unless a row before it
+        # already went in a newer one.
+        rows_by_shard = {}
+        month = None
+        for r in self.__rowcollection.iterate_rows():
+            own_month = self.__shard_of_commit.get(r.commithash,
+                                                   r.datestr[0:7])
+            if month is None or own_month > month:
+                month = own_month
+            rows_by_shard.setdefault(month, []).append(r)
+
+        for month in rows_by_shard:
+            if (month not in self.__loaded_months and
+                    month in self.__manifest.get_months()):
+                # (only a shard we have every row of can be rewritten. new rows can only
+                #  ever land in the newest shard, and that one always gets loaded)
+                raise FinickError('Rows were about to go into the month shard '
+                                  + month + ', which is not loaded.')
+
+        return rows_by_shard
+
+    def _flush_shards_to_disk(self):
+        rows_by_shard = self._rows_by_shard()
+        loaded_months = sorted(set(rows_by_shard) | self.__loaded_months)
+
+        shard_of_row = {}
+        is_open = {}
+        for month in self.__manifest.get_months():
+            is_open[month] = self.__manifest.is_open(month)
+        for month in loaded_months:
+            is_open[month] = False
+            for r in rows_by_shard.get(month, []):
+                shard_of_row[r.commithash] = month
+                if r.still_needs_review() or self.__rowcollection.reminder_is_still_open(
+                        r):
+                    is_open[month] = True
+
+        def ref_is_worth_keeping(month, todo_ref):
+            # the manifest only keeps a FIXD todo-ref when, some later run, the row it
+            # closes could be loaded without the FIXD row: when the closed TODO/PLS is
+            # in a different shard, and that shard is open. (every open shard is loaded
+            # right now, so looking among the loaded rows is enough)
+            closed_row = self.__rowcollection.find_commit_by_short_hash(
+                todo_ref)
+            if closed_row is None or not closed_row.rowtype_merits_reminder():
+                return False
+            closed_shard = shard_of_row[closed_row.commithash]
+            return closed_shard != month and is_open[closed_shard]
+
+        for month in self.__manifest.get_months():
+            if month not in loaded_months:
+                refs = [tr for tr in self.__manifest.get_fixd_refs(month)
+                        if ref_is_worth_keeping(month, tr)]
+                self.__manifest.set_shard(month,
+                                          self.__manifest.get_count(month),
+                                          is_open[month], refs)
+
+        for month in loaded_months:
+            rows = rows_by_shard.get(month, [])
+            shard_file = self.__finick_config.get_shard_file_fullname_fullpath(
+                month)
+
+            fixd_refs = []
+            for r in rows:
+                if r.row_type == r.TYPE_FIXD:
+                    fixd_refs.extend([tr for tr in r.todo_refs
+                                      if ref_is_worth_keeping(month, tr)])
+
+            shard_text = self.__CURR_VERSION_STRING + '\n' + ''.join(
+                [r.format_for_diskfile() for r in rows])
+
+            # a shard that nothing changed in is left alone (so git sees no change):
+            if os.path.isfile(shard_file):
+                with open(shard_file, encoding='utf-8', mode='r') as f:
+                    if f.read() == shard_text:
+                        shard_text = None
+
+            if shard_text is not None:
+                _write_text_then_replace(shard_file, shard_text)
+
+            for r in rows:
+                self.__shard_of_commit[r.commithash] = month
+            self.__loaded_months.add(month)
+            self.__manifest.set_shard(month, len(rows), is_open[month],
+                                      fixd_refs)
+
+        # the manifest goes last. it is the db file, so it is what git and the next run look at first:
+        _write_text_then_replace(self.__file_location,
+                                 self.__manifest.format_for_diskfile())
+
+        self.__version_line_was_read = True
+        self.__is_migrating_to_shards = False
+        self.__rowcollection.mark_as_unmodified()
+
+        # the old whole-file offsets describe the file from before the migration, at best:
+        self.__rowcollection.forget_loaded_block_offsets()
+        self.__loaded_file_stat = None
 
     def purge_older_reviewed_commits(self):
 
-        # TODO. will use WeeksTilPurge setting from the ini.
+        # uses the WeeksTilPurge setting from the ini. (zero or less means: never purge)
         # (however, anything NEWER than the 'forefront' must be kept no matter what)
-        pass
+        weeks = self.__finick_config.purgeweeks
+        if weeks <= 0:
+            return
+
+        cutoff = datetime.datetime.now() - datetime.timedelta(weeks=weeks)
+        cutoff_datestr = cutoff.strftime('%Y-%m-%d_%H:%M:%S')
+
+        # the rows only get written into the archive files when we flush. that way, a run
+        # that never flushes (like '-t') leaves both the db file and the archives alone.
+        self.__rows_awaiting_archive.extend(
+            self.__rowcollection.take_out_rows_reviewed_before(cutoff_datestr))
+
+    def _write_rows_awaiting_archive(self):
+        # one archive file per quarter (by commit date). rows get appended, so each
+        # archive keeps the db order of its rows.
+        rows_by_quarter = {}
+        for r in self.__rows_awaiting_archive:
+            rows_by_quarter.setdefault(_quarter_label_of(r.datestr),
+                                       []).append(r)
+
+        for quarter in sorted(rows_by_quarter):
+            archive_file = self.__finick_config.get_archive_file_fullname_fullpath(
+                quarter)
+
+            archive_text = ''
+            if not os.path.isfile(archive_file):
+                # an archive is read back just like a db file, so it starts with the version line, too:
+                archive_text = self.__CURR_VERSION_STRING + '\n'
+
+            archive_text += ''.join([r.format_for_diskfile()
+                                     for r in rows_by_quarter[quarter]])
+
+            # mode 'a' APPENDS to the file (and creates it when needed)
+            with open(archive_file, encoding='utf-8', mode='a') as f:
+                f.write(archive_text)
+
+        self.__rows_awaiting_archive = []
+
+    def _read_archived_rows(self):
+        # every row from every archive file (oldest quarter first), plus the rows still
+        # waiting to be archived. this reads ALL the archives, so only call it when needed.
+        results = []
+        seen = set()
+
+        for archive_file in self.__finick_config.get_all_archive_files_fullname_fullpath(
+        ):
+            for r in self._read_rows_of_plain_db_file(archive_file):
+                # (a crash between writing an archive and writing the db could leave a repeat)
+                if r.commithash not in seen:
+                    seen.add(r.commithash)
+                    results.append(r)
+
+        for r in self.__rows_awaiting_archive:
+            if r.commithash not in seen:
+                seen.add(r.commithash)
+                results.append(r)
+
+        return results
 
     def add_new_commits(self):
 
@@ -498,24 +1323,66 @@ class DbTextFile(object):
             raise FinickError(
                 'You are expected to read and parse a file before calling add_new_commits')
 
-        # nice-to-have: pass in something more recent (some appropriate commit hash), so that
-        # git log doesn't have to go back to the 'BeginningOfTime' each time.
-        # the commit must be chosen carefully. when we have 2+ diverging paths in the git
-        # history that have not yet merged back together, we do NOT want to pick a commit
-        # from during that diverged part of history.
-        # (note: limiting how far to go back is even MORE RELEVANT -- and with a bigger
-        #  potential for optimization -- when we get here via db_merge_with_completed...)
-        commits = finicky.gitting.git_retrieve_history(self.__finick_config)
+        # rather than have git log go back to the 'BeginningOfTime' each time, we
+        # walk only the history since a commit we already have. the commit must be
+        # chosen carefully. when we have 2+ diverging paths in the git history
+        # that have not yet merged back together, we do NOT want to pick a commit
+        # from during that diverged part of history. so we only accept an anchor
+        # that git confirms is an ancestor of HEAD. (history that got rewritten
+        # will fail that test, and then we go back to the BeginningOfTime.)
+        if self.__manifest is None:
+            candidates = self.__rowcollection.get_anchor_candidates()
+        else:
+            # with month shards, most rows are not even loaded. the manifest remembers
+            # which commit the last history walk ended at, and every row in the shards
+            # is an ancestor of it. if that one fails, we walk (and load) everything.
+            candidates = [self.__manifest.get_tip()
+                          ] if self.__manifest.get_tip() != '' else []
+
+        anchor = ''
+        for candidate in candidates:
+            if finicky.gitting.git_commit_is_ancestor_of_head(
+                    self.__finick_config, candidate):
+                anchor = candidate
+                break
+
+        known_commit_checker = self.__rowcollection.contains_this_commit
+        archived_hashes = set()
+
+        if anchor == '':
+            # the whole history replaces the collection. with month shards, every row
+            # must be loaded first, or the rows of unloaded shards would come back as WAIT.
+            self._load_every_shard()
+
+            # walking from the BeginningOfTime also brings back every commit that we
+            # purged into the archives. those must not come back as fresh WAIT rows.
+            archived_hashes = set(r.commithash
+                                  for r in self._read_archived_rows())
+            if len(archived_hashes) > 0:
+                known_commit_checker = lambda commit_hash_str: (
+                    commit_hash_str in archived_hashes or
+                    self.__rowcollection.contains_this_commit(commit_hash_str))
+
+        commits = finicky.gitting.git_retrieve_history(
+            self.__finick_config, anchor, known_commit_checker)
 
         incoming_rows = []
 
         for c in commits:
             drow = DbRow.create_from_gitting_tuple(c)
-            incoming_rows.append(drow)
+            if drow.commithash not in archived_hashes:
+                incoming_rows.append(drow)
 
         # we are TRANSFERING ownership of incoming_rows. do NOT use
         # incoming_rows further after passing it to __rowcollection
-        self.__rowcollection.add_new_commits(incoming_rows)
+        self.__rowcollection.add_new_commits(incoming_rows, anchor != '')
+
+        # git gave us oldest-first, so the last one is the newest commit. (unless the
+        # collection ignored the new rows. then the next walk should see them again)
+        if (self.__manifest is not None and len(incoming_rows) > 0 and
+                self.__rowcollection.contains_this_commit(incoming_rows[-1]
+                                                          .commithash)):
+            self.__manifest.set_tip(incoming_rows[-1].commithash)
 
         incoming_rows = None  # we MUST not mutate the rows from here onward!
 
@@ -537,9 +1404,36 @@ class DbTextFile(object):
 
         return results
 
-    def get_human_driven_commits_aggregated_by_week(self, finick_config):
+    def get_human_driven_commit_counts_by_week(self, finick_config):
+
+        # defer this import (it may pull in numpy) until charts are really wanted:
+        from finicky.chart_counts import ChartCountsTable
+
+        # charts cover all of history, so every month shard is needed:
+        self._load_every_shard()
 
-        return self.__rowcollection.get_mapped_human_commits(finick_config)
+        if not finick_config.opt_chartarchives:
+            return ChartCountsTable(self.__rowcollection.iterate_rows())
+
+        # with '--chart-archives' we chart the purged (archived) rows, too. they are
+        # older than everything left in the db, so they go first:
+        everything = [
+            r for r in self._read_archived_rows()
+            if not self.__rowcollection.contains_this_commit(r.commithash)
+        ]
+        everything.extend(self.__rowcollection.iterate_rows())
+
+        return ChartCountsTable(everything)
+
+    def iterate_rows(self):
+
+        # the rows themselves, in order. (for reading. changes should go through our member functions)
+        return self.__rowcollection.iterate_rows()
+
+    def get_committers(self):
+
+        # every distinct committer email, in the order first seen:
+        return self.__rowcollection.get_committers()
 
     def generate_todos_for(self, user_identity):
 
@@ -548,8 +1442,27 @@ class DbTextFile(object):
         return self.__rowcollection.find_todos_and_please_requests(
             user_identity)
 
+    def generate_todos_for_everyone(self):
+
+        # a map. each key is a committer email, and it maps to that committer's TODO/PLS rows:
+        return self.__rowcollection.find_todos_and_please_requests_of_everyone(
+        )
+
     def merge_completed_assignments(self, assign_file):
 
+        # a todo-ref may point at a commit in a month shard that is not loaded yet.
+        # those shards must be loaded BEFORE the merge starts, because loading puts
+        # the rows in a fresh order (and the merge holds on to row positions).
+        # (refs that are too short get their error from the merge itself)
+        short_refs = [tr[0:DbRow.SHORT_H_SIZE]
+                      for ar in assign_file.iterate_rows()
+                      for tr in ar.todo_refs
+                      if len(tr) >= DbRow.SHORT_H_SIZE]
+        if self._has_unloaded_shards() and not all(
+                self.__rowcollection.short_commithash_is_known_in_collection(
+                    sr) for sr in short_refs):
+            self._load_every_shard()
+
         # note: the rows from assignments might be mutated after this call:
         return self.__rowcollection.merge_completed_assignments(
             assign_file, self.__finick_config)
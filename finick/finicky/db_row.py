@@ -10,9 +10,8 @@ import re  # for this problem, I'll use regular expressions! Now I have two prob
 
 
 def AssertType_DbRow(o):
-    rhs = DbRow.dummyinstance()
     incoming_type = str(type(o))
-    if type(o) != type(rhs):
+    if type(o) != DbRow:
         raise FinickError(
             "AssertType_DbRow failed. DbRow was required, but instead we got: "
             + incoming_type)
@@ -23,20 +22,106 @@ def _fail_setter(self, value):
         "The value you are trying to assign to in DbRow is read-only.")
 
 
-def _get_the_monday_matching_a_given_date(date_obj):
-    # http://stackoverflow.com/questions/5882405/get-date-from-iso-week-number-in-python
-    week_of_year = (date_obj.isocalendar()[1])
-    the_year = date_obj.year
+_HOPEFIXD_SANITY_CHECK_RE = re.compile('hope.?FIXD', re.IGNORECASE)
+# because of parens in the next regex, the results we retrieve is ONLY the commithash after the colon:
+_HOPEFIXD_RE = re.compile('\\bhope.?FIXD:([\\w]+)\\b', re.IGNORECASE)
+
+
+def _test_the_regexp(re_to_test):
+    test_debug = re_to_test.findall(
+        'a thing hopefixd:aa hope-fixd:b but HOPEFIXD: and more hope-FIXD:ccc,hope-FIXD:xxx')
+    if not (len(test_debug) == 4 and test_debug[0] == 'aa' and
+                test_debug[1] == 'b' and test_debug[2] == 'ccc' and
+                test_debug[3] == 'xxx'):
+        raise FinickError(
+            'Regular expression for hope-FIXD comments is malfunctioning. Requires developer attention.')
+
+
+# leave this test 'alive' in here. if anyone ventures to edit the expressions above, this must still pass.
+# (it runs once, when this module is imported)
+_test_the_regexp(_HOPEFIXD_RE)
+
+# committer and reviewer emails repeat on nearly every row of the db file.
+# keeping ONE shared string object per distinct email saves a lot of memory.
+# (we keep our own dict, because the builtin intern() cannot take unicode strings in python 2)
+_interned_emails = {}
+
+
+def _intern_email(email_str):
+    return _interned_emails.setdefault(email_str, email_str)
+
+
+# day numbers count whole days since 1970-01-01 (which was a thursday).
+_ORDINAL_OF_DAY_ZERO = datetime.date(1970, 1, 1).toordinal()
+_DAY_ZERO_WEEKDAY = 3  # monday is 0
+_SECONDS_PER_DAY = 24 * 60 * 60
+_DATETIME_OF_DAY_ZERO = datetime.datetime(1970, 1, 1)
+
+
+# many rows share a day, so the day number of each 'YYYY-MM-DD' gets worked out once.
+_day_number_by_date_part = {}
+
+
+def _epoch_seconds_from_datestr(datestr):
+    # datestr looks like "1970-03-01_01:01:01". slicing it is far cheaper than strptime.
+    # (these are plain seconds counted as if the date string were UTC. see comments
+    #  in gitting.py about our timezone issues. the strings are only a 'courtesy'.)
+    try:
+        date_part = datestr[0:10]
+        day_number = _day_number_by_date_part.get(date_part, None)
+        if day_number is None:
+            day_number = datetime.date(
+                int(date_part[0:4]), int(date_part[5:7]),
+                int(date_part[8:10])).toordinal() - _ORDINAL_OF_DAY_ZERO
+            _day_number_by_date_part[date_part] = day_number
+        return (day_number * _SECONDS_PER_DAY + int(datestr[11:13]) * 3600 +
+                int(datestr[14:16]) * 60 + int(datestr[17:19]))
+    except ValueError:
+        raise FinickError('Unable to parse the commit date: ' + datestr)
+
+
+def _monday_day_number(day_number):
+    return day_number - (day_number + _DAY_ZERO_WEEKDAY) % 7
+
+
+# a chart run asks every row for its monday. thousands of rows share one week, so
+# each monday datetime gets built once, keyed by its day number.
+_monday_by_day_number = {}
+
 
-    ret = datetime.datetime.strptime('%04d-%02d-1' % (the_year, week_of_year),
-                                     '%Y-%W-%w')
-    if datetime.date(the_year, 1, 4).isoweekday() > 4:
-        ret -= datetime.timedelta(days=7)
+def _get_monday_of_day_number(day_number):
+    monday_number = _monday_day_number(day_number)
+    monday = _monday_by_day_number.get(monday_number, None)
+    if monday is None:
+        monday = _DATETIME_OF_DAY_ZERO + datetime.timedelta(days=monday_number)
+        _monday_by_day_number[monday_number] = monday
+    return monday
 
-    return ret
+
+def _get_the_monday_matching_a_given_date(date_obj):
+    # midnight at the start of the monday (on or before date_obj) of the same week.
+    # we simply step back by the weekday. (going through year + week-of-year gave the
+    # wrong monday for the last days of december and the first days of january.)
+    return _get_monday_of_day_number(date_obj.toordinal() -
+                                     _ORDINAL_OF_DAY_ZERO)
 
 
 class DbRow(object):
+    # the db file can hold tens of thousands of rows. with __slots__ we avoid
+    # paying for a per-row __dict__. (names here get mangled just like 'self.__x')
+    # yapf: disable
+    __slots__ = ('__creator', '__file_comment', '__committer', '__commit_hash',
+                 '__commit_datestr', '__rowtype', '__reviewer', '__todo_refs',
+                 '__action_comment', '__forefront_string', '__hopeful_fixd_refs',
+                 '__is_frozen',
+                 # whether our row text passed _throw_exception_unless_text_parses_back since the last change:
+                 '__text_is_checked',
+                 # parsed lazily from __commit_datestr (None until someone asks):
+                 '__epoch_seconds',
+                 # has_pending_hopefix is (deliberately) left unset until db_file puts it on a reminder row:
+                 'has_pending_hopefix')
+    # yapf: enable
+
     @classmethod
     def dummyinstance(cls):
         return cls(True)
@@ -54,14 +139,30 @@ class DbRow(object):
     def _create_from_internal_map(cls, the_map):
         return cls(False, '', '', None, the_map)
 
-    def _get_dateobj(self):
+    @classmethod
+    def create_from_cache_fields(cls, cache_fields):
+        # cache_fields is a tuple that came from get_cache_fields. the first field is the file_comment
+        return cls(False, '', cache_fields[0], None, None, cache_fields)
+
+    def _get_epoch_seconds(self):
         # recall that __commit_datestr is formatted like so:
         #"1970-03-01_01:01:01"
-        return datetime.datetime.strptime(self.__commit_datestr,
-                                          "%Y-%m-%d_%H:%M:%S")
+        if self.__epoch_seconds is None:
+            self.__epoch_seconds = _epoch_seconds_from_datestr(
+                self.__commit_datestr)
+        return self.__epoch_seconds
+
+    def _get_dateobj(self):
+        return _DATETIME_OF_DAY_ZERO + datetime.timedelta(
+            seconds=self._get_epoch_seconds())
+
+    def _get_week_key(self):
+        # the day number of the monday that starts our week. (consecutive weeks differ by 7)
+        return _monday_day_number(self._get_epoch_seconds() // _SECONDS_PER_DAY)
 
     def _get_monday(self):
-        return _get_the_monday_matching_a_given_date(self._get_dateobj())
+        return _get_monday_of_day_number(self._get_epoch_seconds() //
+                                         _SECONDS_PER_DAY)
 
     def _get_my_string(self):
         return self._convert_rowtype_constant_to_string(self.row_type)
@@ -80,9 +181,12 @@ class DbRow(object):
                  string_to_parse='',
                  file_comment='',
                  gitt_tuple=None,
-                 internal_map=None):
+                 internal_map=None,
+                 cache_fields=None):
 
         self.__creator = ''  # this variable is intended only for debugging/tracing
+        self.__is_frozen = False
+        self.__text_is_checked = False
 
         self.__file_comment = file_comment
         self.__committer = ''
@@ -90,6 +194,7 @@ class DbRow(object):
         # see comments in gitting.py about our timezone issues. again,
         # for now, date strings are just a 'courtesy', not hard data.
         self.__commit_datestr = ''
+        self.__epoch_seconds = None
         self.__rowtype = self.TYPE_ERRORTYPE
         self.__reviewer = ''
         # each todo ref will be the FIRST few chars of a hash. always length DbRow.SHORT_H_SIZE
@@ -104,6 +209,9 @@ class DbRow(object):
         elif internal_map is not None:
             self.__creator = '_create_from_internal_map'
             self._initialize_from_map(internal_map)
+        elif cache_fields is not None:
+            self.__creator = 'create_from_cache_fields'
+            self._initialize_from_cache_fields(cache_fields)
         elif False == is_dummy:
             self.__creator = 'create_from_string'
             self._initialize_from_string(string_to_parse)
@@ -122,8 +230,15 @@ class DbRow(object):
 
     commitdate   = property(   _get_dateobj,                         _fail_setter)
 
+    # the raw "1970-03-01_01:01:01" string. (it sorts the same way the dates do, with no parsing)
+    datestr      = property(lambda s : s.__commit_datestr,           _fail_setter)
+
     prior_monday = property(   _get_monday,                          _fail_setter)
 
+    epoch_seconds = property(  _get_epoch_seconds,                   _fail_setter)
+
+    week_key     = property(   _get_week_key,                        _fail_setter)
+
     """Note: user-code could still (inappropriately) modify ITEMS in todo_refs list. Please do not."""
     todo_refs    = property(lambda s : s.__todo_refs,                _fail_setter)
 
@@ -141,6 +256,38 @@ class DbRow(object):
 
     # yapf: enable
 
+    def frozen_snapshot(self):
+        """Returns a cheap copy of this row that refuses every mutating call.
+        Hand these out (instead of copy.deepcopy) when callers must not be able to edit our rows.
+        """
+        twin = DbRow.__new__(DbRow)
+        twin.__creator = 'frozen_snapshot'
+        twin.__is_frozen = True
+        twin.__file_comment = self.__file_comment
+        # strings are immutable, so sharing them is fine. the todo_refs list is the only thing needing a copy:
+        twin.__committer = self.__committer
+        twin.__commit_hash = self.__commit_hash
+        twin.__commit_datestr = self.__commit_datestr
+        twin.__epoch_seconds = self.__epoch_seconds
+        twin.__rowtype = self.__rowtype
+        twin.__reviewer = self.__reviewer
+        twin.__todo_refs = list(self.__todo_refs)
+        twin.__action_comment = self.__action_comment
+        twin.__forefront_string = self.__forefront_string
+        twin.__hopeful_fixd_refs = self.__hopeful_fixd_refs
+        twin.__text_is_checked = self.__text_is_checked
+        return twin
+
+    def _throw_exception_if_frozen(self):
+        if self.__is_frozen:
+            raise FinickError('Row ' + self.__commit_hash +
+                              ' is a frozen snapshot. It cannot be modified.')
+
+    def _about_to_change(self):
+        # every mutating call starts here. the row text will change, so it needs checking again:
+        self._throw_exception_if_frozen()
+        self.__text_is_checked = False
+
     def rowtype_merits_reminder(self):
         return self.__rowtype == self.TYPE_TODO or self.__rowtype == self.TYPE_PLS
 
@@ -159,66 +306,37 @@ class DbRow(object):
                 self.__rowtype == self.TYPE_NOW)
 
     def _convert_rowtype_constant_to_string(self, rowtype_int):
-        if rowtype_int == self.TYPE_OK:
-            return 'OK'
-        elif rowtype_int == self.TYPE_OOPS:
-            return 'OOPS'
-        elif rowtype_int == self.TYPE_WAIT:
-            return 'WAIT'
-        elif rowtype_int == self.TYPE_FIXD:
-            return 'FIXD'
-        elif rowtype_int == self.TYPE_TODO:
-            return 'TODO'
-        elif rowtype_int == self.TYPE_HIDE:
-            return 'HIDE'
-        elif rowtype_int == self.TYPE_NOW:
-            return 'NOW'
-        elif rowtype_int == self.TYPE_PLS:
-            return 'PLS'
-        elif rowtype_int == self.TYPE_RVRT:
-            return 'RVRT'
-        else:
+        try:
+            return _ROWTYPE_TO_STRING[rowtype_int]
+        except KeyError:
             err = 'Invalid row type: ' + str(rowtype_int)
             raise FinickError(err)
 
     def _convert_string_to_rowtype_constant(self, rowtype_string, linetext):
-        if rowtype_string == 'OK':
-            return self.TYPE_OK
-        elif rowtype_string == 'OOPS':
-            return self.TYPE_OOPS
-        elif rowtype_string == 'WAIT':
-            return self.TYPE_WAIT
-        elif rowtype_string == 'FIXD':
-            return self.TYPE_FIXD
-        elif rowtype_string == 'TODO':
-            return self.TYPE_TODO
-        elif rowtype_string == 'HIDE':
-            return self.TYPE_HIDE
-        elif rowtype_string == 'NOW':
-            return self.TYPE_NOW
-        elif rowtype_string == 'PLS':
-            return self.TYPE_PLS
-        elif rowtype_string == 'RVRT':
-            return self.TYPE_RVRT
-        else:
+        try:
+            return _STRING_TO_ROWTYPE[rowtype_string]
+        except KeyError:
             err = 'Invalid row type: ' + rowtype_string + ', on row: [' + linetext + ']'
             raise FinickError(err)
 
     def assign_for_current_review_session(self, reviewer_email):
         """This function should always do 'the opposite' of cancel_assignment_for_current_review_session
         """
+        self._about_to_change()
         self.__rowtype = self.TYPE_NOW
-        self.__reviewer = reviewer_email
+        self.__reviewer = _intern_email(reviewer_email)
 
     def cancel_assignment_for_current_review_session(self):
         """This function should always do 'the opposite' of assign_for_current_review_session
         """
+        self._about_to_change()
         self.__rowtype = self.TYPE_WAIT
         self.__reviewer = ''
 
     def _store_incoming_todo_refs(self, assignment_row, ref_checker_func):
         """This helper function plays a part in merging a completed assignment with a db_file row
         """
+        self._about_to_change()
         # here we enforce that there is at least one valid todo-ref.
         # also, we make the todo-refs all be exactly the same length!
         # lastly, replace self.__todo_refs with these special-length strings.
@@ -273,6 +391,8 @@ class DbRow(object):
             raise FinickError(
                 'Function misuse. Only call into here with a row of type TODO or PLS.')
 
+        self._about_to_change()
+
         ar.throw_exception_if_bad_actioncomment()
         self.__rowtype = ar.row_type
         self.__reviewer = incoming_reviewer
@@ -284,6 +404,8 @@ class DbRow(object):
         # otherwise, mark our OOPS and also return the _NEW_ RVRT ROW.
         # Note: CALLING CODE EXPECTS A GUARANTEE that assignment_row.row_type will
         # end up set to TYPE_TODO if we failed to revert the OOPS.
+        self._about_to_change()
+        assignment_row._about_to_change()
         new_row = None
 
         incoming_reviewer = self._choose_between_our_reviewer_string_and_ar(
@@ -317,6 +439,7 @@ class DbRow(object):
         # if 'ar' is still in row_type 'NOW', then put it back to 'WAIT'
         # other valid values for ar type: OK, FIXD, TODO, PLS, OOPS.
         # (currently, this function explicitly refuses to handle OOPS)
+        self._about_to_change()
 
         # optimistically assume we will do 1 row-count worth of work:
         work_count = 1  # (might drop to zero later)
@@ -386,26 +509,22 @@ class DbRow(object):
         CommitStringMaintWithoutSession=Cedrus_Automated_Maintenance_Commit
         """
 
-        row_parts = []
-
-        try:
-            CAR = 0
-            CDR = 1
-
-            # pass None to make all blobs of whitespace a single separator:
-            car_cdr = string_to_parse.split(None, 1)
-            row_parts.append(car_cdr[CAR])
-
-            for _i_ in range(0, 5):
-                car_cdr = car_cdr[CDR].split(None, 1)
-                row_parts.append(car_cdr[CAR])
-                if car_cdr[CDR].startswith(self.ACTION_COMMENT_CHAR):
-                    row_parts.append(car_cdr[CDR])
-                    break
-
-        except IndexError:
-            # we arrive here for lines that do not possess the maximum 7 columns
-            pass
+        # pass None to make all blobs of whitespace a single separator.
+        # there are never more than 7 columns, so 6 splits is all we need:
+        row_parts = string_to_parse.split(None, 6)
+
+        # the action comment is the first column (from the date column onward) that
+        # starts with ACTION_COMMENT_CHAR. it runs all the way to the end of the line,
+        # spaces and all. so when we find it, we re-split to get it back in one piece.
+        for k in range(2, len(row_parts)):
+            if row_parts[k].startswith(self.ACTION_COMMENT_CHAR):
+                if k < 6:
+                    row_parts = string_to_parse.split(None, k)
+                break
+        else:
+            # no comment. (any text beyond column 6 that is not a comment gets dropped)
+            if len(row_parts) == 7:
+                row_parts.pop()
 
         len_of_row_parts = len(row_parts)
 
@@ -413,7 +532,7 @@ class DbRow(object):
             err_str = 'Unable to parse columns in this row: [' + string_to_parse + ']'
             raise FinickError(err_str)
 
-        self.__committer = row_parts[0]
+        self.__committer = _intern_email(row_parts[0])
         self.__commit_hash = row_parts[1]
         # see comments in gitting.py about our timezone issues. again,
         # for now, date strings are just a 'courtesy', not hard data.
@@ -423,7 +542,7 @@ class DbRow(object):
 
         # note: in order to have a comment, we MUST have a reviewer! even if the reviewer is '..nobody..'
         if len_of_row_parts >= 5:
-            self.__reviewer = row_parts[4]
+            self.__reviewer = _intern_email(row_parts[4])
 
         # each todo ref will be the FIRST few chars of a hash. always length SHORT_H_SIZE
         if len_of_row_parts >= 6:
@@ -461,7 +580,7 @@ class DbRow(object):
         c_hash, committer_eml, date_string, ignored_subject = gitt_tuple[0].split(
             COL_DELIM)
 
-        self.__committer = committer_eml
+        self.__committer = _intern_email(committer_eml)
         self.__commit_hash = c_hash
         if len(action_comment_string) > 0:
             self.__action_comment = self.ACTION_COMMENT_CHAR + ' ' + action_comment_string
@@ -497,10 +616,10 @@ class DbRow(object):
         self.__commit_datestr = datetime.datetime.now().strftime(
             "%Y-%m-%d_%H:%M:%S")  # format duplicated in _initialize_from_tuple
 
-        self.__committer = internal_map['__committer']
+        self.__committer = _intern_email(internal_map['__committer'])
         self.__commit_hash = internal_map['__commit_hash']
         self.__rowtype = internal_map['__rowtype']
-        self.__reviewer = internal_map['__reviewer']
+        self.__reviewer = _intern_email(internal_map['__reviewer'])
         self.__todo_refs = internal_map['__todo_refs']
         self.__action_comment = internal_map['__action_comment']
 
@@ -509,20 +628,35 @@ class DbRow(object):
                 self.ACTION_COMMENT_CHAR):
                 self.__action_comment = self.ACTION_COMMENT_CHAR + ' ' + self.__action_comment
 
+    def get_cache_fields(self):
+        """Everything needed to rebuild this row later WITHOUT parsing text. (see db_cache.py)
+        Only the types marshal can handle: strings, ints and lists.
+        """
+        # yapf: disable
+        return (self.__file_comment, self.__committer, self.__commit_hash,
+                self.__commit_datestr, self.__rowtype, self.__reviewer,
+                list(self.__todo_refs), self.__action_comment,
+                self.__forefront_string)
+        # yapf: enable
+
+    def _initialize_from_cache_fields(self, cache_fields):
+        # (the file comment, cache_fields[0], was already stored by __init__)
+        self.__committer = _intern_email(cache_fields[1])
+        self.__commit_hash = cache_fields[2]
+        self.__commit_datestr = cache_fields[3]
+        self.__rowtype = cache_fields[4]
+        self.__reviewer = _intern_email(cache_fields[5])
+        self.__todo_refs = list(cache_fields[6])
+        self.__action_comment = cache_fields[7]
+        self.__forefront_string = cache_fields[8]
+
     def _parse_hopefixds(self, file_comment_str):
         if self.__rowtype == self.TYPE_ERRORTYPE:
             raise FinickError(
                 'Logic bug. We require a row type by this point.')
 
-        sanity_check_re = re.compile('hope.?FIXD', re.IGNORECASE)
-        # because of parens in the next regex, the results we retrieve is ONLY the commithash after the colon:
-        regex = re.compile('\\bhope.?FIXD:([\\w]+)\\b', re.IGNORECASE)
-
-        # leave this test 'alive' in here. if anyone ventures to edit the expressions above, this must still pass:
-        self._test_the_regexp(regex)
-
-        possible_tags = sanity_check_re.findall(file_comment_str)
-        actual_tags = regex.findall(file_comment_str)
+        possible_tags = _HOPEFIXD_SANITY_CHECK_RE.findall(file_comment_str)
+        actual_tags = _HOPEFIXD_RE.findall(file_comment_str)
 
         # if it looks like someone TRIED to use a hope-FIXD tag but didn't quite match the syntax, be helpful:
         if len(possible_tags) > len(actual_tags):
@@ -593,16 +727,11 @@ class DbRow(object):
                 # finally do what we came here to do:
                 self.__hopeful_fixd_refs = ','.join(actual_tags)
 
-    def _test_the_regexp(self, re_to_test):
-        test_debug = re_to_test.findall(
-            'a thing hopefixd:aa hope-fixd:b but HOPEFIXD: and more hope-FIXD:ccc,hope-FIXD:xxx')
-        if not (len(test_debug) == 4 and test_debug[0] == 'aa' and
-                    test_debug[1] == 'b' and test_debug[2] == 'ccc' and
-                    test_debug[3] == 'xxx'):
-            raise FinickError(
-                'Regular expression for hope-FIXD comments is malfunctioning. Requires developer attention.')
+    def has_forefront_marker(self):
+        return self.__forefront_string != ''
 
     def set_forefront_marker(self, forefront_marker_string):
+        self._about_to_change()
         if self.__forefront_string != '':
             print(
                 'Warning: setting forefront info on a DbRow that already had such info.')
@@ -611,28 +740,15 @@ class DbRow(object):
 
     def write_to_diskfile(self, the_file):
         # the_file is expected to be a TextIOBase (from io)
+        the_file.write(self.format_for_diskfile())
 
+    def format_for_diskfile(self):
+        """Returns this row's complete block of db file text (file comment, row, forefront marker),
+        with every line ending in a newline.
+        """
         EMAIL_COL_WIDTH = 27  # later this should be in the config
         TYPE_COL_WIDTH = 7
 
-        if self.__file_comment != '':
-            the_file.write(self.__file_comment + '\n')
-
-        row_text = ''
-
-        row_text += (self.__committer + ' ' +
-                     (' ' * (EMAIL_COL_WIDTH - len(self.__committer) - 1)))
-
-        row_text += (self.__commit_hash + '   ')
-
-        # see comments in gitting.py about our timezone issues. again,
-        # for now, date strings are just a 'courtesy', not hard data.
-        row_text += (self.__commit_datestr + '   ')
-
-        rowtype_str = self._convert_rowtype_constant_to_string(self.__rowtype)
-        row_text += (rowtype_str + ' ' +
-                     (' ' * (TYPE_COL_WIDTH - len(rowtype_str) - 1)))
-
         reviewer_output = self.__reviewer
 
         # next comes the reviewer. BUT:
@@ -642,58 +758,109 @@ class DbRow(object):
                 # comment is nonempty but __reviewer was empty. fix that:
                 reviewer_output = '..nobody..'
 
-        row_text += (reviewer_output + ' ' +
-                     (' ' * (EMAIL_COL_WIDTH - len(reviewer_output) - 1)))
-
-        comma_sep = ','  # this is duplicated in _initialize_from_string
-
-        # each todo ref will be the FIRST few chars of a hash. always length SHORT_H_SIZE
-        # refs, with commas
-        for tr in self.__todo_refs:
-            row_text += (tr + comma_sep)  # we remove the final comma next!
-
-        if len(self.__todo_refs) > 0:
-            # remove the trailing comma:
-            row_text = row_text.rstrip(comma_sep)
-            row_text += ('   ')
-
-        # note: in order to have a comment, we MUST have a reviewer! even if the reviewer is '..nobody..'
-        if self.__action_comment != '':
             if not self.__action_comment.startswith(self.ACTION_COMMENT_CHAR):
                 raise FinickError(
                     'We always expect ACTION_COMMENT_CHAR to have been prepended by now.')
 
-        row_text += (self.__action_comment)
+        comma_sep = ','  # this is duplicated in _initialize_from_string
 
-        # we could do more sanity checking here. make sure what we are
-        # about to save parses back as something equal to self
+        # each todo ref will be the FIRST few chars of a hash. always length SHORT_H_SIZE
+        # refs, with commas. (rstrip, so that trailing empty refs leave no trailing commas)
+        refs_output = comma_sep.join(self.__todo_refs).rstrip(comma_sep)
+        if len(self.__todo_refs) > 0:
+            refs_output += '   '
+
+        # every column gets at least one space after it, and the padded ones
+        # get filled out to their column width:
+        # yapf: disable
+        row_text = ''.join([
+            (self.__committer + ' ').ljust(EMAIL_COL_WIDTH),
+            self.__commit_hash, '   ',
+            # see comments in gitting.py about our timezone issues. again,
+            # for now, date strings are just a 'courtesy', not hard data.
+            self.__commit_datestr, '   ',
+            (self._convert_rowtype_constant_to_string(self.__rowtype) + ' ').ljust(TYPE_COL_WIDTH),
+            (reviewer_output + ' ').ljust(EMAIL_COL_WIDTH),
+            refs_output,
+            self.__action_comment
+        ]).rstrip()
+        # yapf: enable
+
+        # make sure what we are about to save parses back as something equal to self.
+        # (a row that has not changed since its text last passed this check can skip it)
+        if not self.__text_is_checked:
+            self._throw_exception_unless_text_parses_back(row_text,
+                                                          reviewer_output)
+            self.__text_is_checked = True
+
+        block = [row_text, '\n']
 
-        # end this row
-        row_text = row_text.rstrip()
-        the_file.write(row_text + '\n')
+        if self.__file_comment != '':
+            block = [self.__file_comment, '\n'] + block
 
         if self.__forefront_string != '':
-            the_file.write(self.__forefront_string + '\n')
-
+            block += [self.__forefront_string, '\n']
+
+        return ''.join(block)
+
+    def _throw_exception_unless_text_parses_back(self, row_text,
+                                                 reviewer_output):
+        # (the file comment gets written verbatim, so only the row itself needs checking)
+        twin = DbRow.create_from_string(row_text, '')
+
+        # parsing always drops a final empty todo ref, so we compare against what remains:
+        expected_refs = list(self.__todo_refs)
+        while len(expected_refs) > 0 and expected_refs[len(expected_refs) -
+                                                       1] == '':
+            expected_refs.pop()
+
+        # yapf: disable
+        if (twin.__committer != self.__committer or
+            twin.__commit_hash != self.__commit_hash or
+            twin.__commit_datestr != self.__commit_datestr or
+            twin.__rowtype != self.__rowtype or
+            twin.__reviewer != reviewer_output or
+            twin.__todo_refs != expected_refs or
+            twin.__action_comment != self.__action_comment.rstrip()):
+            raise FinickError(
+                'Refusing to save a db row that would not read back the same. Row: [' + row_text + ']')
+        # yapf: enable
 
 
 # yapf: disable
 
-DbRow.ACTION_COMMENT_CHAR = property(lambda s: '#', _fail_setter)
+# these are plain class attributes (not properties) so that reading them costs no function call.
+# they are still read-only on any DbRow instance, since __slots__ leaves no instance __dict__ to assign into.
+
+DbRow.ACTION_COMMENT_CHAR = '#'
 
 # SHORT_H_SIZE means "short HASH size". We always store the todo-ref hashes in the same specific size string.
 # we rely heavily on knowing they are length 10. (rely on this fact for string equality testing)
-DbRow.SHORT_H_SIZE   = property(lambda s:  10,   _fail_setter)
-
-DbRow.TYPE_ERRORTYPE = property(lambda s:  -1,   _fail_setter)
-DbRow.TYPE_OK        = property(lambda s:   1,   _fail_setter)  # reviewer approved/accepted the commit
-DbRow.TYPE_OOPS      = property(lambda s:   2,   _fail_setter)  # reviewer rejected the commit
-DbRow.TYPE_WAIT      = property(lambda s:   3,   _fail_setter)  # not yet reviewed. awaiting review.
-DbRow.TYPE_FIXD      = property(lambda s:   4,   _fail_setter)  # means both approval and the commit closes a PLS ('please' request) or a TODO
-DbRow.TYPE_TODO      = property(lambda s:   5,   _fail_setter)  # reviewer defers the commit, contingent upon further items being addressed
-DbRow.TYPE_HIDE      = property(lambda s:   6,   _fail_setter)  # a commit that is 'null' for reviewing purposes. hidden/excluded from the process.
-DbRow.TYPE_NOW       = property(lambda s:   7,   _fail_setter)  # assigned for review during the current active session
-DbRow.TYPE_PLS       = property(lambda s:   8,   _fail_setter)  # (short for 'please'). like todo, only we accept the commit, but with further requests for later.
-DbRow.TYPE_RVRT      = property(lambda s:   9,   _fail_setter)  # a revert/reversal that is accepted and addresses a prior OOPS
+DbRow.SHORT_H_SIZE   =  10
+
+DbRow.TYPE_ERRORTYPE =  -1
+DbRow.TYPE_OK        =   1  # reviewer approved/accepted the commit
+DbRow.TYPE_OOPS      =   2  # reviewer rejected the commit
+DbRow.TYPE_WAIT      =   3  # not yet reviewed. awaiting review.
+DbRow.TYPE_FIXD      =   4  # means both approval and the commit closes a PLS ('please' request) or a TODO
+DbRow.TYPE_TODO      =   5  # reviewer defers the commit, contingent upon further items being addressed
+DbRow.TYPE_HIDE      =   6  # a commit that is 'null' for reviewing purposes. hidden/excluded from the process.
+DbRow.TYPE_NOW       =   7  # assigned for review during the current active session
+DbRow.TYPE_PLS       =   8  # (short for 'please'). like todo, only we accept the commit, but with further requests for later.
+DbRow.TYPE_RVRT      =   9  # a revert/reversal that is accepted and addresses a prior OOPS
 
 # yapf: enable
+
+_STRING_TO_ROWTYPE = {
+    'OK': DbRow.TYPE_OK,
+    'OOPS': DbRow.TYPE_OOPS,
+    'WAIT': DbRow.TYPE_WAIT,
+    'FIXD': DbRow.TYPE_FIXD,
+    'TODO': DbRow.TYPE_TODO,
+    'HIDE': DbRow.TYPE_HIDE,
+    'NOW': DbRow.TYPE_NOW,
+    'PLS': DbRow.TYPE_PLS,
+    'RVRT': DbRow.TYPE_RVRT
+}
+
+_ROWTYPE_TO_STRING = dict((v, k) for k, v in _STRING_TO_ROWTYPE.items())
@@ -0,0 +1,122 @@
+from __future__ import print_function
+from __future__ import division  # py3 style. division promotes to floating point.
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+from finicky.error import FinickError
+
+
+class DbShardManifest(object):
+    """The small index that stands in for the db file when the ini file says
+    'DbShardByMonth=1'. The rows themselves then live in shard files, one per month.
+
+    Each shard holds one unbroken stretch of the db rows (in db order, which is git's
+    topo order). Reading the shards oldest month first gives back the whole db, in order.
+    A row goes in the shard of the newest commit month seen so far (counting the row
+    itself). So a row whose commit date is older than the rows before it stays in the
+    same shard as those rows, and the order is kept.
+
+    Without opening any shard, the manifest tells us:
+
+        - which months have a shard, and how many rows each one holds
+        - whether a shard is 'open' (holds a WAIT/NOW row or an open TODO/PLS)
+        - the FIXD todo-refs in each shard that close a TODO/PLS in some OPEN shard.
+          (a TODO/PLS whose shard is loaded needs these to know it was closed)
+        - the 'tip': the commit the last history walk ended at. (every row in the
+          shards is an ancestor of it, so the next walk can start there)
+
+    It is a text file (like the db file) so that it can be committed and diffed.
+    Its size grows with the number of months, not with the number of rows.
+    """
+
+    # the prefix before 'finick_code_reviews' is to make sure this would be INVALID if read as an email address
+    VERSION_PREFIX = '@:..finick_code_reviews db_manifest '
+    VERSION_STRING = VERSION_PREFIX + 'v0.01'
+
+    def __init__(self):
+        # month ('2016-01') -> [row count, is_open, fixd refs list]
+        self.__shards = {}
+        self.__tip = ''
+
+    def absorb_text(self, text):
+        version_was_read = False
+
+        for line in text.split('\n'):
+            linetext = line.strip()
+            if len(linetext) == 0:
+                continue
+
+            if not version_was_read:
+                if linetext != self.VERSION_STRING:
+                    raise FinickError(
+                        'Current version of finick db_manifest cannot parse file version: '
+                        + linetext)
+                version_was_read = True
+                continue
+
+            parts = linetext.split()
+
+            if len(parts) == 2 and parts[0] == 'tip':
+                self.__tip = parts[1]
+                continue
+
+            # each shard gets one line: month, row count, open/done, fixd refs.
+            # (the refs are a comma-string, and '-' when there are none)
+            if len(parts) != 4 or parts[2] not in ('open', 'done'):
+                raise FinickError('Unable to parse db_manifest line: ' +
+                                  linetext)
+
+            self.set_shard(parts[0],
+                           int(parts[1]), parts[2] == 'open',
+                           self._split_list(parts[3]))
+
+    def _split_list(self, commastring):
+        if commastring == '-':
+            return []
+        return commastring.split(',')
+
+    def _join_list(self, the_list):
+        if len(the_list) == 0:
+            return '-'
+        return ','.join(the_list)
+
+    def format_for_diskfile(self):
+        lines = [self.VERSION_STRING]
+        if self.__tip != '':
+            lines.append('tip ' + self.__tip)
+        for month in self.get_months():
+            count, is_open, fixd_refs = self.__shards[month]
+            lines.append(' '.join([month, str(count), 'open' if is_open else
+                                   'done', self._join_list(fixd_refs)]))
+
+        return '\n'.join(lines) + '\n'
+
+    def set_shard(self, month, count, is_open, fixd_refs):
+        self.__shards[month] = [count, is_open, fixd_refs]
+
+    def get_tip(self):
+        return self.__tip
+
+    def set_tip(self, commithash_str):
+        self.__tip = commithash_str
+
+    def get_months(self):
+        # oldest month first. (that is also db order)
+        return sorted(self.__shards)
+
+    def get_newest_month(self):
+        # None when there are no shards yet
+        months = self.get_months()
+        return months[-1] if len(months) > 0 else None
+
+    def get_count(self, month):
+        return self.__shards[month][0]
+
+    def get_open_months(self):
+        return [m for m in self.get_months() if self.__shards[m][1]]
+
+    def is_open(self, month):
+        return self.__shards[month][1]
+
+    def get_fixd_refs(self, month):
+        return self.__shards[month][2]
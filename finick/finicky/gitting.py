@@ -4,14 +4,20 @@ from __future__ import unicode_literals
 from __future__ import absolute_import
 
 from finicky.parse_config import AssertType_FinickConfig
+from finicky.commit_cache import CommitClassificationCache
 from finicky.error import FinickError
 
 import subprocess
+import atexit
 import datetime
+import hashlib
 import os
+import tempfile
+import threading
+import timeit
 from io import open
 
-_quietness = ''  # empty string means the ABSENCE of the quiet flag. absence means NO suppressed git stderr
+_quietness = []  # empty list means the ABSENCE of the quiet flag. absence means NO suppressed git stderr
 
 _REASON_STRING_MERGE_WITHOUT_DIFF = 'auto merge commit. no diff available for review.'
 
@@ -29,9 +35,9 @@ def _dec_assign_to_globals(F):
         AssertType_FinickConfig(finick_config)
 
         if finick_config.verbosity >= 1:
-            finicky.gitting._quietness = ' '  # verbosity is ENABLED. we do not use the quiet flag
+            finicky.gitting._quietness = []  # verbosity is ENABLED. we do not use the quiet flag
         else:
-            finicky.gitting._quietness = ' -q '  # verbosity was at ZERO, so apply quietness
+            finicky.gitting._quietness = ['-q']  # verbosity was at ZERO, so apply quietness
 
         return F(*args)
 
@@ -39,19 +45,54 @@ def _dec_assign_to_globals(F):
 
 
 def _git_establish_session_readiness(finick_config, is_session_starting):
-    success1 = _git_establish_session_readiness_impl(
-        finick_config, is_session_starting, finick_config.repopath,
-        finick_config.branch)
 
-    success2 = True
+    if (finick_config.repopath == finick_config.db_repopath) and (
+            finick_config.branch == finick_config.db_branch):
+        return _git_establish_session_readiness_impl(
+            finick_config, is_session_starting, finick_config.repopath,
+            finick_config.branch)
+
+    # two working trees can be readied at the same time (their 'git pull's are
+    # network-bound, so this is where most of our startup time goes). but one
+    # working tree must never do two checkouts at once, so if both paths
+    # point at the same tree, we go one repo at a time.
+    if os.path.realpath(finick_config.repopath) == os.path.realpath(
+            finick_config.db_repopath):
+        success1 = _git_establish_session_readiness_impl(
+            finick_config, is_session_starting, finick_config.repopath,
+            finick_config.branch)
 
-    if (finick_config.repopath != finick_config.db_repopath) or (
-            finick_config.branch != finick_config.db_branch):
         success2 = _git_establish_session_readiness_impl(
             finick_config, is_session_starting, finick_config.db_repopath,
             finick_config.db_branch)
 
-    return success1 and success2
+        return success1 and success2
+
+    outcomes = {}
+
+    def readiness_worker(which, path, branch):
+        try:
+            outcomes[which] = (_git_establish_session_readiness_impl(
+                finick_config, is_session_starting, path, branch), None)
+        except Exception as e:
+            outcomes[which] = (False, e)
+
+    db_thread = threading.Thread(target=readiness_worker,
+                                 args=('db', finick_config.db_repopath,
+                                       finick_config.db_branch))
+    db_thread.start()
+
+    readiness_worker('code', finick_config.repopath, finick_config.branch)
+
+    db_thread.join()
+
+    # report problems in a fixed order (code repo first, then db repo),
+    # no matter which thread happened to finish first:
+    for which in ['code', 'db']:
+        if outcomes[which][1] is not None:
+            raise outcomes[which][1]
+
+    return outcomes['code'][0] and outcomes['db'][0]
 
 
 def _git_establish_session_readiness_impl(finick_config, is_session_starting,
@@ -61,11 +102,12 @@ def _git_establish_session_readiness_impl(finick_config, is_session_starting,
 
     _git_current_user_email(finick_config)
 
-    _git_exec_and_return_stdout('git checkout ' + _quietness + branch, path)
+    _git_exec_and_return_stdout(['git', 'checkout'] + _quietness + [branch],
+                                path)
 
     # the next command needs git 1.6.3 or newer, per http://stackoverflow.com/questions/1417957/show-just-the-current-branch-in-git
-    results = _git_exec_and_return_stdout('git rev-parse --abbrev-ref HEAD',
-                                          path)
+    results = _git_exec_and_return_stdout(
+        ['git', 'rev-parse', '--abbrev-ref', 'HEAD'], path)
 
     if results.rstrip() != branch:
         raise FinickError(
@@ -86,8 +128,9 @@ def _git_establish_session_readiness_impl(finick_config, is_session_starting,
            be called afterwards to bring the work tree up to date with
            the merge result.
            """
-        _git_exec_and_return_stdout(
-            'git pull ' + _quietness + ' origin ' + branch, path)
+        if _git_remote_branch_has_news(path, branch):
+            _git_exec_and_return_stdout(
+                ['git', 'pull'] + _quietness + ['origin', branch], path)
 
     # if we are starting one session, there must not be any other session in progress (even from other INI file)
     # check for a currently-open, in-progress review session.
@@ -98,6 +141,42 @@ def _git_establish_session_readiness_impl(finick_config, is_session_starting,
     return True
 
 
+def _git_remote_branch_has_news(path, branch):
+    # a cheap way to find out whether a 'git pull' could bring us anything:
+    # ask origin where its branch points (one ls-remote round trip, no objects
+    # transferred) and compare that to our local HEAD.
+    try:
+        results = _git_exec_and_return_stdout(
+            ['git', 'ls-remote', 'origin', 'refs/heads/' + branch], path)
+    except FinickError:
+        # let the 'git pull' run (and, if need be, fail) the usual way
+        return True
+
+    remote_tip = results.split('\t')[0].strip()
+    if len(remote_tip) != 40:
+        return True
+
+    local_tip = _git_runner.batch_backend_for(path).info('HEAD')
+    if local_tip is None:
+        return True
+
+    if local_tip[0] == remote_tip:
+        return False
+
+    # if we do not even have the remote's commit yet, then there is news:
+    if _git_runner.batch_backend_for(path).info(remote_tip) is None:
+        return True
+
+    # we have the remote's commit. there is only news if we are not already ahead of it:
+    try:
+        _git_exec_and_return_stdout(
+            ['git', 'merge-base', '--is-ancestor', remote_tip, 'HEAD'], path)
+    except FinickError:
+        return True
+
+    return False
+
+
 @_dec_assign_to_globals
 def git_establish_session_readiness_end(finick_config):
     return _git_establish_session_readiness(finick_config,
@@ -116,46 +195,78 @@ def git_repo_contains_committed_file(finick_config, which_repopath,
 
     AssertType_FinickConfig(finick_config)
 
-    # log has this {--ignore-submodules[=<when>]}, but it only matters for showing patches? (diffs)
-    # this can be a false positive if the file is on disk, but has been deleted from the repo
-    results = _git_exec_and_return_stdout('git log -1 --oneline ' + which_file,
-                                          which_repopath)
+    # we ask whether the file exists in the tree of the HEAD commit. that is
+    # false for a file that is on disk but has been deleted from the repo, and
+    # also false if you staged a file but never committed it.
+    # ('HEAD:./path' is resolved relative to the co-process's working dir)
+    relative_file = os.path.relpath(which_file, which_repopath)
+    relative_file = relative_file.replace(os.sep, '/')
+
+    found = _git_runner.batch_backend_for(which_repopath).info('HEAD:./' +
+                                                               relative_file)
+
+    return found is not None and found[1] == 'blob'
+
+
+@_dec_assign_to_globals
+def git_commit_is_ancestor_of_head(finick_config, commit_hash_str):
+
+    AssertType_FinickConfig(finick_config)
 
-    problem_01 = 0 == len(results)
+    # an unknown hash (manually-edited db row, rewritten history) can be
+    # ruled out with a round trip to the cat-file co-process. no fork needed.
+    found = _git_runner.batch_backend_for(finick_config.repopath).info(
+        commit_hash_str)
 
-    # (addresses the false positive mentioned above)
-    # this returns an empty string even if we got a false positive earlier.
-    # (we don't use ls-files alone, because it gives a false positive if you staged a file but never committed it)
-    results = _git_exec_and_return_stdout('git ls-files ' + which_file,
-                                          which_repopath)
+    if found is None or found[1] != 'commit':
+        return False
 
-    problem_02 = 0 == len(results)
+    # 'merge-base --is-ancestor' answers 'no' by returning exit code 1.
+    # our helper raises on that, and for us that just means 'no'.
+    try:
+        _git_exec_and_return_stdout(
+            ['git', 'merge-base', '--is-ancestor', commit_hash_str, 'HEAD'],
+            finick_config.repopath)
+    except FinickError:
+        return False
 
-    return not (problem_01 or problem_02)
+    return True
 
 
 @_dec_assign_to_globals
-def _git_difftree_does_find_content(finick_config, commit_hash_str):
+def _git_difftree_find_merges_with_content(finick_config, commit_hash_list):
 
     # using a 'diff-tree --cc' trick learned from this web page:
     #   http://haacked.com/archive/2014/02/21/reviewing-merge-commits/
     # the 'normal' way to try to view a diff or generate a patch for a particular
     # commit is insufficient for merge commits. (read that blog post for more info)
-    results = _git_exec_and_return_stdout(
-        'git diff-tree --cc --pretty=oneline ' + commit_hash_str,
-        finick_config.repopath)
+    #
+    # all the commits get probed by ONE git process. we feed the hashes over
+    # stdin. '--always' makes git print our header line for every commit, even
+    # the ones that have no diff at all.
+    if len(commit_hash_list) == 0:
+        return set()
+
+    HEADER_TOKEN = 'finick-merge-probe '
 
-    # we expect the oneline info (on one line), then a blank line, then (optionally) a diff
+    results = _git_exec_and_return_stdout(
+        ['git', 'diff-tree', '--cc', '--stdin', '--always',
+         '--pretty=format:' + HEADER_TOKEN + '%H'], finick_config.repopath,
+        '\n'.join(commit_hash_list) + '\n')
 
-    #partition returns a 3-tuple containing the part before the
-    #separator, the separator itself, and the part after
-    oneline_info, separator, tail = results.partition('\n')
-    blank_line, separator, tail = tail.partition('\n')
-    diff_text, separator, tail = tail.partition('\n')
+    # we expect our header line for each commit, then (optionally) a diff.
+    # diff lines always begin with 'diff', 'index', '@@@', or a +/-/space
+    # prefix, so they can never be mistaken for our header.
+    hashes_with_content = set()
+    current_hash = ''
 
-    we_have_a_diff = not diff_text == ''
+    for line in results.split('\n'):
+        if line.startswith(HEADER_TOKEN):
+            current_hash = line[len(HEADER_TOKEN):].rstrip()
+        elif line.rstrip() != '' and current_hash != '':
+            hashes_with_content.add(current_hash)
 
-    return we_have_a_diff
+    return hashes_with_content
 
 
 @_dec_assign_to_globals
@@ -188,11 +299,87 @@ def _git_list_submodules(finick_config):
     return submodule_paths
 
 
+def _git_log_commit_records(log_lines, sep_token):
+    # yields one (commit_pretty, list_of_numstat_lines) tuple per commit.
+    # log_lines is any iterable of lines, where each commit begins with a
+    # line that starts with sep_token. only ONE commit's numstat lines are
+    # held at any given time.
+    commit_pretty = None
+    numstat_lines = []
+
+    for line in log_lines:
+        if line.startswith(sep_token):
+            if commit_pretty is not None:
+                yield commit_pretty, numstat_lines
+
+            commit_pretty = line[len(sep_token):]
+            numstat_lines = []
+
+        elif commit_pretty is None:
+            # either we have only seen blank lines so far, or else we had better have detected our prefix:
+            if line.strip() != '':
+                raise FinickError(
+                    'Assumption violated. why doesn\'t this start with SEP_TOKEN?')
+        else:
+            numstat_lines.append(line)
+
+    if commit_pretty is not None:
+        yield commit_pretty, numstat_lines
+
+
 @_dec_assign_to_globals
-def git_retrieve_history(finick_config):
+def _git_open_classification_cache(finick_config):
 
     AssertType_FinickConfig(finick_config)
 
+    # the cached HIDE/WAIT decisions stay valid only as long as the submodule
+    # list and the configured tool strings stay the same:
+    fingerprint = hashlib.sha1()
+
+    gitmod_file = finick_config.repopath + os.sep + '.gitmodules'
+    if os.path.isfile(gitmod_file):
+        try:
+            with open(gitmod_file, mode='rb') as f:
+                fingerprint.update(f.read())
+        except IOError:
+            raise FinickError(
+                'IOError while trying to read the .gitmodules file')
+
+    for commit_string in finick_config.get_all_commit_strings():
+        fingerprint.update(b'\0' + commit_string.encode('utf-8'))
+
+    return CommitClassificationCache(
+        finick_config.get_commitcache_file_fullname_fullpath(),
+        fingerprint.hexdigest())
+
+
+@_dec_assign_to_globals
+def git_retrieve_history(finick_config,
+                         anchor_hash='',
+                         known_commit_checker=None):
+
+    AssertType_FinickConfig(finick_config)
+
+    # when anchor_hash is given, we only walk commits that are NOT reachable from
+    # the anchor (git's 'anchor..HEAD' range). the caller is responsible for first
+    # making sure (see git_commit_is_ancestor_of_head) that the anchor is an
+    # ancestor of HEAD. otherwise the caller should pass '' to walk everything.
+    revision_range = []
+    if anchor_hash != '':
+        head = _git_runner.batch_backend_for(finick_config.repopath).info(
+            'HEAD')
+        if head is not None and head[0] == anchor_hash:
+            # nothing has been committed since the anchor. nothing to walk.
+            return []
+
+        revision_range = [anchor_hash + '..HEAD']
+
+    # known_commit_checker (when given) answers whether the db file already
+    # has a row for some commit. such rows win over anything we produce here,
+    # so we never spend a git call classifying them again.
+    if known_commit_checker is None:
+        known_commit_checker = lambda commit_hash_str: False
+
     # --date=local shows timestamps in user's local timezone.
     # meaning that the dates are 'translated' to the timezone of the current
     # machine where somebody is running the finick tool. This means
@@ -244,45 +431,40 @@ def git_retrieve_history(finick_config):
     # do NOT exclude merges! merges often deserve review.
     # see: http://haacked.com/archive/2014/02/21/reviewing-merge-commits/
     # use %aD to guarantee parsing by strptime.
-    results = _git_exec_and_return_stdout(
-        'git log --topo-order --numstat --date=local  --pretty=format:\"' +
-        SEP_TOKEN + '%H' + COL_DELIM + '%ae' + COL_DELIM + '%aD' + COL_DELIM +
-        '%s\"  --since=' + str(
-            finick_config.startepoch), finick_config.repopath)
-
-    # the first one (results[0]) will still have SEP_TOKEN on the front of it
-    results = results.split('\n' + SEP_TOKEN)
-
-    if len(results) > 0:
-        empty_result_0 = results[0] == ''
-        expected_prefix = results[0].startswith(SEP_TOKEN)
-        # either we had an empty result, or else we had better have detected our prefix:
-        if not (empty_result_0 or expected_prefix):
-            raise FinickError(
-                'Assumption violated. why doesn\'t this start with SEP_TOKEN?')
-
-        if empty_result_0:
-            del results[0]  # prevent us from looping over results
-        else:
-            results[0] = results[0].replace(SEP_TOKEN, '', 1)
+    # the log can be huge (the whole history of the repo). rather than hold all
+    # of its text in memory at once, we walk it one commit record at a time.
+    log_lines = _git_exec_and_stream_stdout_lines(
+        ['git', 'log', '--topo-order', '--numstat', '--date=local',
+         '--pretty=format:' + SEP_TOKEN + '%H' + COL_DELIM + '%ae' + COL_DELIM
+         + '%aD' + COL_DELIM + '%s',
+         '--since=' + str(finick_config.startepoch)] + revision_range,
+        finick_config.repopath)
 
     list_of_subs = _git_list_submodules(finick_config)
     # there are TABS on the next line. it matches git output.
     sub_exclusions = ['1\t1\t' + s for s in list_of_subs]
 
+    classification_cache = _git_open_classification_cache(finick_config)
+
     list_of_tuples = []
+    # auto-merge candidates are classified later, all in one bulk git call:
+    merge_candidates = []
+
+    for commit_pretty, numstat_lines in _git_log_commit_records(log_lines,
+                                                                 SEP_TOKEN):
+        c_hash = commit_pretty.split(COL_DELIM)[0]
 
-    for each_commit in results:
-        #partition returns a 3-tuple containing the part before the
-        #separator, the separator itself, and the part after
-        commit_pretty, separator, numstat_lines = each_commit.partition('\n')
+        cached = classification_cache.lookup(c_hash)
+        if cached is not None:
+            # decided on some earlier run. no need to look at the numstat lines.
+            list_of_tuples.append((commit_pretty, cached[0], cached[1]))
+            continue
 
         commit_is_hidden = False
         reason_to_hide = ''
 
         nonempty_lines = 0
         submodule_lines = 0
-        numstat_lines = numstat_lines.split('\n')
         for l in numstat_lines:
             l = l.lstrip().rstrip()
             if l == '':
@@ -298,13 +480,13 @@ def git_retrieve_history(finick_config):
             # if we are incorrect and there is another way to get
             # here, things should still work out ok.
 
-            # if it is a fully auto-merge, then hide.
-            c_hash = commit_pretty.split(COL_DELIM)[0]
-            non_auto = _git_difftree_does_find_content(finick_config, c_hash)
-            if not non_auto:
-                # appears to be an auto-merge
-                commit_is_hidden = True
-                reason_to_hide = _REASON_STRING_MERGE_WITHOUT_DIFF
+            # if it is a fully auto-merge, then hide. (decided after this loop)
+            if not known_commit_checker(c_hash):
+                merge_candidates.append((len(list_of_tuples), c_hash))
+
+            # (known merges are not classified at all. so nothing to cache.)
+            list_of_tuples.append((commit_pretty, False, ''))
+            continue
 
         elif nonempty_lines == submodule_lines:
             # all we had in this commit were submodule 'pointer' changes
@@ -322,8 +504,25 @@ def git_retrieve_history(finick_config):
                 commit_is_hidden = True
                 reason_to_hide = _REASON_STRING_FINICK_DRIVEN_COMMIT
 
-        list_of_tuples.insert(
-            0, (commit_pretty, commit_is_hidden, reason_to_hide))
+        list_of_tuples.append((commit_pretty, commit_is_hidden, reason_to_hide))
+        classification_cache.store(c_hash, commit_is_hidden, reason_to_hide)
+
+    non_auto = _git_difftree_find_merges_with_content(
+        finick_config, [c_hash for i, c_hash in merge_candidates])
+
+    for i, c_hash in merge_candidates:
+        if c_hash not in non_auto:
+            # appears to be an auto-merge
+            list_of_tuples[i] = (list_of_tuples[i][0], True,
+                                 _REASON_STRING_MERGE_WITHOUT_DIFF)
+
+        classification_cache.store(c_hash, list_of_tuples[i][1],
+                                   list_of_tuples[i][2])
+
+    classification_cache.save()
+
+    # git gave us newest-first. we return oldest-first:
+    list_of_tuples.reverse()
 
     return list_of_tuples
 
@@ -333,7 +532,7 @@ def _git_current_user_email(finick_config):
 
     AssertType_FinickConfig(finick_config)
 
-    results = _git_exec_and_return_stdout('git config user.email',
+    results = _git_exec_and_return_stdout(['git', 'config', 'user.email'],
                                           finick_config.repopath)
     results = results.rstrip().lstrip()
 
@@ -346,13 +545,13 @@ def _git_current_user_email(finick_config):
 
 def _git_push(path, branch):
     _git_exec_and_return_stdout(
-        'git push ' + _quietness + ' origin ' + branch, path)
+        ['git', 'push'] + _quietness + ['origin', branch], path)
 
 
 def _git_commit_and_push(path, branch, commit_note1, commit_note2):
+    # (each note is its own argv item, so quotes inside of notes are harmless)
     _git_exec_and_return_stdout(
-        'git commit -m \"' + commit_note1 + '\" -m \"' + commit_note2 + '\"',
-        path)
+        ['git', 'commit', '-m', commit_note1, '-m', commit_note2], path)
 
     _git_push(path, branch)
 
@@ -361,19 +560,22 @@ def _git_stage_the_edited_db(finick_config):
     AssertType_FinickConfig(finick_config)
 
     the_db = finick_config.get_db_file_fullname_fullpath()
+    # rows purged out of the db file went into archive files. those must be committed, too.
+    # (and so must the month shards, when the ini file asks for those)
+    the_archives = finick_config.get_all_archive_files_fullname_fullpath()
+    the_shards = finick_config.get_all_shard_files_fullname_fullpath()
 
     # unlike other calls, we do _NOT_ use repopath for the shell call dir
-    _git_exec_and_return_stdout('git add ' + the_db, finick_config.confdir)
+    _git_exec_and_return_stdout(
+        ['git', 'add', the_db] + the_archives + the_shards,
+        finick_config.confdir)
 
 
 @_dec_assign_to_globals
 def git_perform_maintenance_commit(finick_config):
     AssertType_FinickConfig(finick_config)
 
-    the_db = finick_config.get_db_file_fullname_fullpath()
-
-    # unlike other calls, we do _NOT_ use repopath for the shell call dir
-    _git_exec_and_return_stdout('git add ' + the_db, finick_config.confdir)
+    _git_stage_the_edited_db(finick_config)
 
     commit_note = finick_config.str_maint
 
@@ -382,7 +584,7 @@ def git_perform_maintenance_commit(finick_config):
     # the git add succeeds even if 'the_db' had no changes to be staged.
     # when that happens, the git commit will fail.
     try:
-        _git_exec_and_return_stdout('git commit -m \"' + commit_note + '\"',
+        _git_exec_and_return_stdout(['git', 'commit', '-m', commit_note],
                                     finick_config.db_repopath)
 
         c_success = True
@@ -450,17 +652,17 @@ def git_best_effort_to_commit_a_revert(finick_config, hash_to_revert, comment):
     reason_to_hide = ''
 
     reverted = False
-    in_case_of_failure = 'git reset --hard HEAD '
+    in_case_of_failure = ['git', 'reset', '--hard', 'HEAD']
 
     try:
         # Note: there is no '-q' (quiet) option to pass to git revert
-        _git_exec_and_return_stdout('git revert -n ' + hash_to_revert,
+        _git_exec_and_return_stdout(['git', 'revert', '-n', hash_to_revert],
                                     finick_config.repopath)
 
         reverted = True
     except:
         print('Warning: unable to do a clean revert of ' + hash_to_revert +
-              '. Will now do a ' + in_case_of_failure.rstrip())
+              '. Will now do a ' + ' '.join(in_case_of_failure))
 
     if False == reverted:
         _git_exec_and_return_stdout(in_case_of_failure, finick_config.repopath)
@@ -477,49 +679,51 @@ def git_best_effort_to_commit_a_revert(finick_config, hash_to_revert, comment):
         commit_note2 += 'due to: ' + comment
 
         _git_exec_and_return_stdout(
-            'git commit -m \"' + commit_note1 + '\" -m \"' + commit_note2 +
-            '\"', finick_config.repopath)
+            ['git', 'commit', '-m', commit_note1, '-m', commit_note2],
+            finick_config.repopath)
 
-        output = _git_exec_and_return_stdout(
-            'git log -1 --pretty=format:\"%H\"', finick_config.repopath)
+        found = _git_runner.batch_backend_for(finick_config.repopath).info(
+            'HEAD')
 
-        if len(output) != 40:
+        if found is None or len(found[0]) != 40:
             raise FinickError(
-                'Unexpected output from the \'git log -1 ...\' command to retreive most recent commit hash.')
+                'Unexpected output from the \'git cat-file\' query to retreive most recent commit hash.')
 
-        reverthash = output
+        reverthash = found[0]
         reason_to_hide = _REASON_STRING_FINICK_REVERT
 
     return reverthash, reason_to_hide
 
 
-def _git_exec_and_return_stdout(command_string, repo_path):
+class _GitRunner(object):
+    """Runs git (never through a shell) and keeps timing info for every call.
 
-    git_output = ''
-    today_datestr = datetime.date.today().strftime("%Y-%m-%d") + ': '
+    Each git command is given as an argv list, e.g. ['git', 'log', '-5'].
+    Because no shell is involved, paths and commit notes that contain spaces
+    or quotes need no escaping. One copy of the environment is made up front
+    and reused for every child process.
+    """
 
-    try:
-        """
-        On Unix, with shell=True: If args is a string, it specifies the
-        command string to execute through the shell. This means that the
-        string must be formatted exactly as it would be when typed at the
-        shell prompt. This includes, for example, quoting or backslash
-        escaping filenames with spaces in them.
-
-        when we set 'shell=True', then the command is one long string.  if
-        we use 'shell=False', then command_string should be =
-        ['git','log','-5'], or something similar
-        """
-        git_process = subprocess.Popen(command_string,
-                                       shell=True,
-                                       stdin=subprocess.PIPE,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE,
-                                       cwd=repo_path)
+    def __init__(self):
+        self.__env = dict(os.environ)
+        # one (command_string, repo_path, seconds, bytes_read, returncode) per call:
+        self.__timings = []
+        self.__batch_backends = {}
+        # _git_establish_session_readiness readies the db repo on a second thread.
+        # this lock guards the timings and the batch backends against that:
+        self.__lock = threading.Lock()
 
-        git_output_bytes, git_errors_bytes = git_process.communicate()
-        git_output = git_output_bytes.decode('utf-8')
-        git_errors = git_errors_bytes.decode('utf-8')
+    def _record(self, command_string, repo_path, started, bytes_read,
+                returncode):
+        elapsed = timeit.default_timer() - started
+        with self.__lock:
+            self.__timings.append((command_string, repo_path, elapsed,
+                                   bytes_read, returncode))
+
+    def _report_outcome(self, command_string, repo_path, git_errors,
+                        returncode):
+
+        today_datestr = datetime.date.today().strftime("%Y-%m-%d") + ': '
 
         # one example of git output that goes to STDERR:
         # if you run 'git checkout XXX' while on XXX, the stderr is:
@@ -535,15 +739,276 @@ def _git_exec_and_return_stdout(command_string, repo_path):
                       '\' (' + command_string + ')'))
 
         # according to the git devs, return code is the proper indicator of success (not checking stderr)
-        if git_process.returncode != 0:
-            err_msg = str(
-                'return code ' + str(git_process.returncode) + ' calling git ('
-                + command_string + ') from path \'' + str(repo_path) + '\'')
+        if returncode != 0:
+            err_msg = str('return code ' + str(returncode) + ' calling git ('
+                          + command_string + ') from path \'' + str(
+                              repo_path) + '\'')
             raise FinickError(err_msg)
 
-    except:
+    def _report_exception(self, command_string, repo_path):
+        today_datestr = datetime.date.today().strftime("%Y-%m-%d") + ': '
         print(today_datestr + 'python exception calling git (' + command_string
               + ') from path \'' + str(repo_path) + '\'')
-        raise  # re-throw the same exception that got us here in the first place
 
-    return git_output
+    def run(self, argv, repo_path, stdin_text=None):
+        command_string = ' '.join(argv)
+        started = timeit.default_timer()
+        git_output = ''
+
+        try:
+            git_process = subprocess.Popen(argv,
+                                           stdin=subprocess.PIPE,
+                                           stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE,
+                                           cwd=repo_path,
+                                           env=self.__env)
+
+            stdin_bytes = None
+            if stdin_text is not None:
+                stdin_bytes = stdin_text.encode('utf-8')
+
+            git_output_bytes, git_errors_bytes = git_process.communicate(
+                stdin_bytes)
+            self._record(command_string, repo_path, started,
+                         len(git_output_bytes), git_process.returncode)
+
+            git_output = git_output_bytes.decode('utf-8')
+            git_errors = git_errors_bytes.decode('utf-8')
+
+            self._report_outcome(command_string, repo_path, git_errors,
+                                 git_process.returncode)
+
+        except:
+            self._report_exception(command_string, repo_path)
+            raise  # re-throw the same exception that got us here in the first place
+
+        return git_output
+
+    def stream_lines(self, argv, repo_path):
+        # a generator. yields each line of git's stdout (decoded, without the
+        # trailing newline) as soon as git writes it. stderr goes to a temporary
+        # file, so that git can never block on a full stderr pipe while we read.
+        command_string = ' '.join(argv)
+        started = timeit.default_timer()
+        bytes_read = 0
+        git_process = None
+
+        try:
+            with tempfile.TemporaryFile() as stderr_file:
+                git_process = subprocess.Popen(argv,
+                                               stdin=subprocess.PIPE,
+                                               stdout=subprocess.PIPE,
+                                               stderr=stderr_file,
+                                               cwd=repo_path,
+                                               env=self.__env)
+                git_process.stdin.close()
+
+                for line_bytes in git_process.stdout:
+                    bytes_read += len(line_bytes)
+                    yield line_bytes.decode('utf-8').rstrip('\n')
+
+                git_process.stdout.close()
+                git_process.wait()
+                self._record(command_string, repo_path, started, bytes_read,
+                             git_process.returncode)
+
+                stderr_file.seek(0)
+                git_errors = stderr_file.read().decode('utf-8')
+
+                self._report_outcome(command_string, repo_path, git_errors,
+                                     git_process.returncode)
+
+        except Exception:
+            self._report_exception(command_string, repo_path)
+            raise  # re-throw the same exception that got us here in the first place
+
+        finally:
+            # if our consumer stopped early, do not leave git running behind us:
+            if git_process is not None and git_process.poll() is None:
+                git_process.kill()
+                git_process.wait()
+
+    def batch_backend_for(self, repo_path):
+        # one cat-file co-process per repo path, started on first use:
+        with self.__lock:
+            backend = self.__batch_backends.get(repo_path, None)
+
+            if backend is None:
+                backend = _GitCatFileBatch(self, repo_path, self.__env)
+                self.__batch_backends[repo_path] = backend
+
+        return backend
+
+    def close_batch_backends(self):
+        with self.__lock:
+            backends = list(self.__batch_backends.values())
+            self.__batch_backends = {}
+
+        for backend in backends:
+            backend.close()
+
+    def get_timing_report(self):
+        with self.__lock:
+            timings = list(self.__timings)
+
+        total = 0.0
+        for t in timings:
+            total += t[2]
+
+        rslt = ('git timing report: ' + str(len(timings)) +
+                ' git call(s), ' + '%.3f' % total + ' seconds in total\n')
+
+        # slowest first, since those are the ones worth looking at:
+        for t in sorted(timings, key=lambda t: t[2], reverse=True):
+            rslt += ('  %8.3fs %10d bytes  rc=%-3d ' % (t[2], t[3], t[4]) +
+                     t[0] + '  (in \'' + str(t[1]) + '\')\n')
+
+        return rslt
+
+
+class _GitCatFileBatch(object):
+    """A long-lived 'git cat-file --batch' (plus '--batch-check') co-process.
+
+    Answers object/commit/tree queries for one repo over a pipe. After the
+    first query starts the child process, each further lookup costs one
+    round trip instead of one fork+exec of git.
+    """
+
+    def __init__(self, runner, repo_path, env):
+        self.__runner = runner
+        self.__repo_path = repo_path
+        self.__env = env
+        self.__processes = {}  # keyed by '--batch' or '--batch-check'
+        self.__stderr_files = {}  # same keys. (a pipe nobody reads could fill up and block git)
+
+    def _process_for(self, mode_flag):
+        git_process = self.__processes.get(mode_flag, None)
+
+        if git_process is None or git_process.poll() is not None:
+            self._close_stderr_file(mode_flag)
+            stderr_file = tempfile.TemporaryFile()
+            git_process = subprocess.Popen(['git', 'cat-file', mode_flag],
+                                           stdin=subprocess.PIPE,
+                                           stdout=subprocess.PIPE,
+                                           stderr=stderr_file,
+                                           cwd=self.__repo_path,
+                                           env=self.__env)
+            self.__processes[mode_flag] = git_process
+            self.__stderr_files[mode_flag] = stderr_file
+
+        return git_process
+
+    def _query(self, mode_flag, object_name):
+        # returns (header_parts, content_bytes). header_parts is None when
+        # git does not know the object. content_bytes is None for --batch-check.
+        if '\n' in object_name:
+            raise FinickError('Object names for git cat-file cannot contain newlines.')
+
+        command_string = 'git cat-file ' + mode_flag + ' ' + object_name
+        started = timeit.default_timer()
+
+        git_process = self._process_for(mode_flag)
+        git_process.stdin.write((object_name + '\n').encode('utf-8'))
+        git_process.stdin.flush()
+
+        header = git_process.stdout.readline()
+        bytes_read = len(header)
+        if header == b'':
+            raise FinickError('The co-process (' + command_string +
+                              ') from path \'' + str(self.__repo_path) +
+                              '\' exited unexpectedly. ' +
+                              self._stderr_text_of(mode_flag))
+
+        # we expect '<sha> <type> <size>', or else '<object> missing' (or 'ambiguous')
+        header_parts = header.decode('utf-8').rstrip('\n').split(' ')
+        content_bytes = None
+
+        if len(header_parts) != 3:
+            header_parts = None
+        elif mode_flag == '--batch':
+            content_bytes = git_process.stdout.read(int(header_parts[2]))
+            git_process.stdout.read(1)  # the newline that follows the content
+            bytes_read += len(content_bytes) + 1
+
+        self.__runner._record(command_string, self.__repo_path, started,
+                              bytes_read, 0)
+
+        return header_parts, content_bytes
+
+    def info(self, object_name):
+        # returns a (full_hash, object_type, size) tuple, or None if unknown
+        header_parts, ignored = self._query('--batch-check', object_name)
+
+        if header_parts is None:
+            return None
+
+        return header_parts[0], header_parts[1], int(header_parts[2])
+
+    def contents(self, object_name):
+        # returns a (full_hash, object_type, content_bytes) tuple, or None if unknown
+        header_parts, content_bytes = self._query('--batch', object_name)
+
+        if header_parts is None:
+            return None
+
+        return header_parts[0], header_parts[1], content_bytes
+
+    def commit_parents(self, object_name):
+        # returns the list of parent hashes, or None if this is not a known commit
+        found = self.contents(object_name)
+
+        if found is None or found[1] != 'commit':
+            return None
+
+        parents = []
+        # commit headers end at the first blank line. the message comes after.
+        for line in found[2].decode('utf-8').split('\n'):
+            if line == '':
+                break
+            if line.startswith('parent '):
+                parents.append(line[len('parent '):])
+
+        return parents
+
+    def _stderr_text_of(self, mode_flag):
+        # whatever the co-process wrote to stderr so far
+        stderr_file = self.__stderr_files[mode_flag]
+        stderr_file.seek(0)
+        return stderr_file.read().decode('utf-8', 'replace').strip()
+
+    def _close_stderr_file(self, mode_flag):
+        stderr_file = self.__stderr_files.pop(mode_flag, None)
+        if stderr_file is not None:
+            stderr_file.close()
+
+    def close(self):
+        for mode_flag, git_process in self.__processes.items():
+            if git_process.poll() is None:
+                git_process.stdin.close()
+                git_process.wait()
+            self._close_stderr_file(mode_flag)
+
+        self.__processes = {}
+
+
+# one runner per process. every git call made by finick goes through it:
+_git_runner = _GitRunner()
+
+atexit.register(_git_runner.close_batch_backends)
+
+
+@_dec_assign_to_globals
+def git_print_timing_report(finick_config):
+
+    AssertType_FinickConfig(finick_config)
+
+    if finick_config.verbosity >= 1:
+        print(_git_runner.get_timing_report())
+
+
+def _git_exec_and_stream_stdout_lines(argv, repo_path):
+    return _git_runner.stream_lines(argv, repo_path)
+
+
+def _git_exec_and_return_stdout(argv, repo_path, stdin_text=None):
+    return _git_runner.run(argv, repo_path, stdin_text)
@@ -12,6 +12,7 @@ except ImportError:
 
 from finicky.error import FinickError
 
+import glob
 import os
 from io import open
 
@@ -43,10 +44,15 @@ class FinickConfig(object):
         self.__str_maint = ''
         self.__str_rvrt = ''
         self.__verbose = -1
+        self.__use_dbcache = False
+        self.__use_shards = False
         self.__invoker_eml = ''
         self.__only_maint = False
         self.__only_todos_for = ''
+        self.__all_todos = False
         self.__charts = False
+        self.__chart_archives = False
+        self.__chart_workers = 1
         self.__requests = []
         self.__mailserver = ''
         self.__mailport = 0
@@ -131,6 +137,10 @@ class FinickConfig(object):
 
     verbosity  = property(lambda s : s.__verbose,       _fail_setter)
 
+    use_db_binary_cache = property(lambda s : s.__use_dbcache, _fail_setter)
+
+    use_month_shards = property(lambda s : s.__use_shards,  _fail_setter)
+
     mailserver = property(lambda s : s.__mailserver,    _fail_setter)
 
     mailport   = property(lambda s : s.__mailport,      _fail_setter)
@@ -151,8 +161,14 @@ class FinickConfig(object):
 
     opt_onlytodos = property(  _printing_todos,         _fail_setter)
 
+    opt_alltodos  = property(lambda s : s.__all_todos,  _fail_setter)
+
     opt_charts    = property(lambda s : s.__charts,     _fail_setter)
 
+    opt_chartarchives = property(lambda s : s.__chart_archives, _fail_setter)
+
+    opt_chartworkers  = property(lambda s : s.__chart_workers,  _fail_setter)
+
     # yapf: enable
 
     def _get_file_fullname_fullpath_by_our_name(self, prefix_string):
@@ -167,12 +183,41 @@ class FinickConfig(object):
         return self.confdir + os.sep + self.configname + '.txt'
 
     def get_todos_file_fullname_fullpath(self):
-        name_prefix = 'todos.for.' + self.todo_debtor
+        return self.get_todos_file_fullname_fullpath_for(self.todo_debtor)
+
+    def get_todos_file_fullname_fullpath_for(self, debtor):
+        name_prefix = 'todos.for.' + debtor
         return self._get_file_fullname_fullpath_by_our_name(name_prefix)
 
     def get_assign_file_fullname_fullpath(self):
         return self._get_file_fullname_fullpath_by_our_name('assignments')
 
+    def get_commitcache_file_fullname_fullpath(self):
+        return self._get_file_fullname_fullpath_by_our_name('commitcache')
+
+    def get_archive_file_fullname_fullpath(self, quarter_label):
+        # quarter_label looks like '2016Q1'
+        return self._get_file_fullname_fullpath_by_our_name('archive.' +
+                                                            quarter_label)
+
+    def get_all_archive_files_fullname_fullpath(self):
+        # oldest quarter first. (the labels sort the same way the quarters do)
+        pattern = self.get_archive_file_fullname_fullpath('*')
+        return sorted(glob.glob(pattern))
+
+    def get_shard_file_fullname_fullpath(self, month_label):
+        # month_label looks like '2016-01'
+        return self._get_file_fullname_fullpath_by_our_name('shard.' +
+                                                            month_label)
+
+    def get_all_shard_files_fullname_fullpath(self):
+        pattern = self.get_shard_file_fullname_fullpath('*')
+        return sorted(glob.glob(pattern))
+
+    def get_dbcache_file_fullname_fullpath(self):
+        # (a binary file, so it gets no '.txt' extension)
+        return self.confdir + os.sep + 'dbcache.' + self.configname + '.bin'
+
     def _initialize_from_file(self, file_location):
 
         cf = configparser.ConfigParser()
@@ -196,6 +241,16 @@ class FinickConfig(object):
         self.__cfgdir = os.path.normpath(location)
         self.__verbose = int(cf.get('GitReviews', 'Verbosity'))
 
+        try:
+            self.__use_dbcache = int(cf.get('GitReviews', 'DbBinaryCache')) > 0
+        except configparser.NoOptionError:
+            self.__use_dbcache = False
+
+        try:
+            self.__use_shards = int(cf.get('GitReviews', 'DbShardByMonth')) > 0
+        except configparser.NoOptionError:
+            self.__use_shards = False
+
         try:
             self.__dbrepopath = cf.get('GitReviews', 'DbRepoPath')
             # do not call normpath til we KNOW it wasn't a NoOptionError.
@@ -280,6 +335,12 @@ class FinickConfig(object):
         except AttributeError:
             self.__only_todos_for = ''
 
+        # ---------- Process the '-a' command-line option: ----------
+        try:
+            self.__all_todos = (parsed_args.all_todos == True)
+        except AttributeError:
+            self.__all_todos = False
+
         # ---------- Process the '-n' command-line option: ----------
         try:
             self.__only_maint = (parsed_args.no_session == True)
@@ -292,11 +353,41 @@ class FinickConfig(object):
         except AttributeError:
             self.__charts = False
 
+        # ---------- Process the '--chart-archives' command-line option: ----------
+        try:
+            self.__chart_archives = (parsed_args.chart_archives == True)
+        except AttributeError:
+            self.__chart_archives = False
+
+        if self.__chart_archives and not self.__charts:
+            raise FinickError(
+                '\'--chart-archives\' only makes sense together with \'-d\'.')
+
+        # ---------- Process the '-j' command-line option: ----------
+        try:
+            self.__chart_workers = parsed_args.chart_workers
+        except AttributeError:
+            self.__chart_workers = 1
+
+        if self.__chart_workers < 1:
+            raise FinickError(
+                '\'-j\' needs a worker count of at least 1. Got: ' + str(
+                    self.__chart_workers))
+
+        if self.__chart_workers != 1 and not self.__charts:
+            raise FinickError('\'-j\' only makes sense together with \'-d\'.')
+
         # ---------- Enforce mutual exclusivity of -n and -t: -------
         if len(self.__only_todos_for) > 0 and self.__only_maint:
             raise FinickError(
                 '\'-t\' and \'-n\' are mutually exclusive. Use one or the other -- not both!')
 
+        # ---------- Enforce mutual exclusivity of -a and -t/-n/-d: -------
+        if self.__all_todos and (len(self.__only_todos_for) > 0 or
+                                 self.__only_maint or self.__charts):
+            raise FinickError(
+                '\'-a\' cannot be combined with \'-t\', \'-n\' or \'-d\'. Use one or the other -- not both!')
+
         # ---------- Enforce mutual exclusivity of -n and -d: -------
         if self.__charts and self.__only_maint:
             raise FinickError(
@@ -312,10 +403,10 @@ class FinickConfig(object):
                     raise FinickError(
                         'Command-line argument for commits requested was turned into an empty list.')
 
-                if self.__only_maint or self.__charts or len(
+                if self.__only_maint or self.__charts or self.__all_todos or len(
                         self.__only_todos_for) > 0:
                     raise FinickError(
-                        'You cannot use the \'-n\' flag (or \'-t\' or \'-d\' flag) while '
+                        'You cannot use the \'-n\' flag (or \'-t\', \'-a\' or \'-d\' flag) while '
                         + 'also providing a list of requested commits (for a '
                         + 'session) at the same time.')
 
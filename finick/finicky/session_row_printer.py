@@ -14,10 +14,18 @@ import os
 
 
 class RowPrinterForSessionStart(object):
-    def __init__(self, finick_config, assignments, todos_n_pleases):
+    def __init__(self,
+                 finick_config,
+                 assignments,
+                 todos_n_pleases,
+                 todos_by_debtor=None):
         self.__finick_config = finick_config
         self.__assignmentlist = assignments
         self.__todoslist = todos_n_pleases
+        # only used with '-a'. each key is a debtor email, mapped to a list of db rows:
+        self.__todos_by_debtor = {}
+        if todos_by_debtor is not None:
+            self.__todos_by_debtor = todos_by_debtor
 
         AssertType_FinickConfig(self.__finick_config)
 
@@ -27,14 +35,33 @@ class RowPrinterForSessionStart(object):
         for t in self.__todoslist:
             AssertType_DbRow(t)
 
+        for key, val in self.__todos_by_debtor.items():
+            for t in val:
+                AssertType_DbRow(t)
+
     def nothing_to_review(self):
         return len(self.__assignmentlist) == 0
 
     def print_reminders(self):
-        if len(self.__todoslist) <= 0:
+        if self.__finick_config.opt_alltodos:
+            if len(self.__todos_by_debtor) <= 0:
+                print(
+                    'No TODOS created. Nobody has any open TODO or PLS reminders.')
+
+            # one report per debtor, in a stable (alphabetical) order:
+            for debtor in sorted(self.__todos_by_debtor):
+                print('\n    ==== Reminders for ' + debtor + ' ====')
+                self._print_reminders_of(debtor,
+                                         self.__todos_by_debtor[debtor])
+        else:
+            self._print_reminders_of(self.__finick_config.todo_debtor,
+                                     self.__todoslist)
+
+    def _print_reminders_of(self, debtor, todos_list):
+        if len(todos_list) <= 0:
             print('No TODOS created. There are ZERO reminders to print into ' +
-                  self.__finick_config.get_todos_file_fullname_fullpath(
-                  ) + ' (so the file was not created).')
+                  self.__finick_config.get_todos_file_fullname_fullpath_for(
+                      debtor) + ' (so the file was not created).')
 
         else:
             t_list = []
@@ -42,8 +69,8 @@ class RowPrinterForSessionStart(object):
             t_list_hf = []  # 'hf' means there is a 'hopeful FIXD' awaiting review
             p_list_hf = []  # 'hf' means there is a 'hopeful FIXD' awaiting review
 
-            # in the RowPrinterForSessionStart ctor, we asserted AssertType_DbRow on all in __todoslist
-            for i in self.__todoslist:
+            # in the RowPrinterForSessionStart ctor, we asserted AssertType_DbRow on all of these
+            for i in todos_list:
                 is_hopefix = False
                 try:
                     if True == i.has_pending_hopefix:
@@ -97,8 +124,8 @@ class RowPrinterForSessionStart(object):
             if True:
                 o += '\n'
 
-            todos_file = self.__finick_config.get_todos_file_fullname_fullpath(
-            )
+            todos_file = self.__finick_config.get_todos_file_fullname_fullpath_for(
+                debtor)
 
             # show the user the text right away (via the print function), and then also save to a file.
             print(o)